@@ -0,0 +1,7 @@
+"""Benchmarks of the task runners on synthetic workspaces.
+
+    python -m benchmarks run -n 64 --sleep 0.001 -o before.json
+    python -m benchmarks compare before.json after.json
+
+Reports are JSON with the commit, so runs on different commits compare.
+"""
@@ -0,0 +1,76 @@
+import argparse
+import json
+import sys
+
+from .dag import Cost, SHAPES
+from .suite import Config, compare, run_case, run_suite, runners
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog = 'python -m benchmarks', description = 'Benchmark task runners')
+    subparsers = parser.add_subparsers(metavar = 'command', required = True)
+
+    subparser_run = subparsers.add_parser('run', help = 'Run the synthetic workspaces on the runners')
+    subparser_run.set_defaults(func = execute_run)
+    subparser_run.add_argument('-s', '--shapes', nargs = '+', choices = list(SHAPES), default = list(SHAPES))
+    subparser_run.add_argument('-r', '--runners', nargs = '+', choices = list(runners()),
+                               help = 'All runners by default')
+    subparser_run.add_argument('-n', '--nodes', type = int, default = 32, help = 'Nodes of every workspace')
+    subparser_run.add_argument('--repeat', type = int, default = 5, help = 'Measured runs of every case')
+    subparser_run.add_argument('--cpu', type = float, default = 0.0, help = 'Busy seconds of every node')
+    subparser_run.add_argument('--sleep', type = float, default = 0.001, help = 'Sleep seconds of every node')
+    subparser_run.add_argument('--io', type = int, default = 0, help = 'File bytes written and read by every node')
+    subparser_run.add_argument('--size', type = int, default = 1024, help = 'Result bytes of every node')
+    subparser_run.add_argument('--seed', type = int, default = 0, help = 'Seed of the random shape')
+    subparser_run.add_argument('--in-process', action = 'store_true',
+                               help = 'Run the cases in this process, the peak memory is then shared')
+    subparser_run.add_argument('-o', '--output', help = 'JSON file for the report, stdout by default')
+
+    subparser_compare = subparsers.add_parser('compare', help = 'Compare two reports, new over old')
+    subparser_compare.set_defaults(func = execute_compare)
+    subparser_compare.add_argument('OLD')
+    subparser_compare.add_argument('NEW')
+
+    subparser_case = subparsers.add_parser('case', help = 'Run one case and print its result, used by run')
+    subparser_case.set_defaults(func = execute_case)
+    subparser_case.add_argument('SHAPE', choices = list(SHAPES))
+    subparser_case.add_argument('RUNNER', choices = list(runners()))
+    subparser_case.add_argument('CONFIG', help = 'Config as JSON')
+
+    return parser
+
+
+def execute_run(args: argparse.Namespace):
+    config = Config(
+        shapes = tuple(args.shapes),
+        runners = tuple(args.runners) if args.runners else None,
+        nodes = args.nodes,
+        repeat = args.repeat,
+        cost = Cost(args.cpu, args.sleep, args.io, args.size),
+        seed = args.seed,
+        isolate = not args.in_process,
+    )
+    report = run_suite(config, log = sys.stderr)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent = 2)
+    else:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent = 2)
+
+
+def execute_case(args: argparse.Namespace):
+    config = Config.from_record(json.loads(args.CONFIG))
+    json.dump(run_case(args.SHAPE, runners()[args.RUNNER], config), sys.stdout)
+
+
+def execute_compare(args: argparse.Namespace):
+    with open(args.OLD) as old, open(args.NEW) as new:
+        rows = compare(json.load(old), json.load(new))
+    for row in rows:
+        print(f"{row['shape']:<8} {row['runner']:<18} throughput x{row['throughput']:.2f}  "
+              f"latency p50 x{row['latency_p50']:.2f}")
+
+
+if __name__ == "__main__":
+    args = create_parser().parse_args(sys.argv[1:])
+    args.func(args)
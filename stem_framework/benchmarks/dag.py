@@ -0,0 +1,131 @@
+"""Synthetic workspaces of given DAG shapes.
+
+Every node is a :class:`SyntheticTask` with the same :class:`Cost`: busy
+CPU time, sleep standing in for waiting on I/O, bytes written to and read
+back from a temporary file, and the size of its result. The graphs have a
+single root, named ``root``, depending on every node nobody else uses.
+"""
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from stem.meta import Meta
+from stem.task import Task
+from stem.workspace import LocalWorkspace
+
+
+@dataclass(frozen=True)
+class Cost:
+    cpu: float = 0.0  # seconds
+    sleep: float = 0.0  # seconds
+    io: int = 0  # bytes
+    size: int = 0  # bytes of the result
+
+    @property
+    def execution(self) -> str:
+        """Execution class of a node for HybridRunner."""
+        return "cpu" if self.cpu > self.sleep else "io"
+
+
+def _spin(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _file_io(size: int):
+    with tempfile.TemporaryFile() as file:
+        file.write(os.urandom(size))
+        file.seek(0)
+        file.read()
+
+
+class SyntheticTask(Task[bytes]):
+
+    def __init__(self, name: str, dependencies: tuple[Task, ...], cost: Cost):
+        self._name = name
+        self.dependencies = dependencies
+        self.cost = cost
+        self.settings = {"execution": cost.execution}
+
+    def transform(self, meta: Meta, /, **kwargs: Any) -> bytes:
+        if self.cost.cpu:
+            _spin(self.cost.cpu)
+        if self.cost.sleep:
+            time.sleep(self.cost.sleep)
+        if self.cost.io:
+            _file_io(self.cost.io)
+        return bytes(self.cost.size)
+
+    def __reduce__(self):
+        # workers only transform, so the graph above the task is not sent
+        return SyntheticTask, (self._name, (), self.cost)
+
+
+@dataclass
+class Synthetic:
+    shape: str
+    workspace: LocalWorkspace
+    root: SyntheticTask
+
+    @property
+    def size(self) -> int:
+        return len(self.workspace.tasks)
+
+
+def _build(shape: str, parents: list[list[int]], cost: Cost) -> Synthetic:
+    """Workspace of nodes ``0..n-1`` where node ``i`` depends on the nodes in ``parents[i]``, all lower."""
+    tasks: list[SyntheticTask] = []
+    used = set()
+    for i, dependencies in enumerate(parents):
+        tasks.append(SyntheticTask(f"node_{i}", tuple(tasks[d] for d in dependencies), cost))
+        used.update(dependencies)
+    root = SyntheticTask("root", tuple(t for i, t in enumerate(tasks) if i not in used), cost)
+    tasks.append(root)
+    workspace = LocalWorkspace(f"synthetic_{shape}", {t.name: t for t in tasks}, set())
+    return Synthetic(shape, workspace, root)
+
+
+def wide(n: int, cost: Cost, seed: int = 0) -> Synthetic:
+    """Independent nodes joined by the root."""
+    return _build("wide", [[] for _ in range(n - 1)], cost)
+
+
+def deep(n: int, cost: Cost, seed: int = 0) -> Synthetic:
+    """One chain."""
+    return _build("deep", [[i - 1] if i else [] for i in range(n - 1)], cost)
+
+
+def diamond(n: int, cost: Cost, seed: int = 0, width: int = 4) -> Synthetic:
+    """Stacked diamonds: a node fans out to ``width`` nodes which join into the next one."""
+    parents: list[list[int]] = [[]]
+    while len(parents) + width + 1 < n:
+        top = len(parents) - 1
+        parents.extend([top] for _ in range(width))
+        parents.append(list(range(top + 1, top + width + 1)))
+    return _build("diamond", parents, cost)
+
+
+def random_dag(n: int, cost: Cost, seed: int = 0, max_parents: int = 3) -> Synthetic:
+    """Every node depends on up to ``max_parents`` random earlier nodes."""
+    rng = random.Random(seed)
+    parents = [sorted(rng.sample(range(i), rng.randint(0, min(i, max_parents)))) for i in range(n - 1)]
+    return _build("random", parents, cost)
+
+
+SHAPES: dict[str, Callable[..., Synthetic]] = {
+    "wide": wide,
+    "deep": deep,
+    "diamond": diamond,
+    "random": random_dag,
+}
+
+
+def build(shape: str, n: int, cost: Optional[Cost] = None, seed: int = 0) -> Synthetic:
+    """Synthetic workspace of the shape with about ``n`` nodes, the root included."""
+    if shape not in SHAPES:
+        raise ValueError(f"unknown shape {shape!r}, expected one of {', '.join(SHAPES)}")
+    return SHAPES[shape](max(n, 2), cost or Cost(), seed)
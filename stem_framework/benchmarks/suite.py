@@ -0,0 +1,207 @@
+"""Runs synthetic workspaces on every runner and collects the figures.
+
+Each case is one shape on one runner: a warm-up run, then ``repeat``
+measured runs on the same runner, every node traced. The figures are
+
+* ``throughput``: nodes evaluated per second of wall time;
+* ``latency``: percentiles of the wall time of one run of the graph;
+* ``queue_wait``: percentiles of the time a node waited for a worker once
+  its dependencies were done;
+* ``overhead``: share of the wall time no node was running, i.e. spent
+  scheduling, dispatching and collecting results;
+* ``parallelism``: run time of the nodes over the wall time;
+* ``peak_rss_kb``: peak resident memory of the interpreter running the
+  case and of its children (process workers), where ``resource`` exists.
+
+Every case runs in a fresh interpreter, so that the peaks are its own; with
+``isolate`` off the cases run in this process and the peaks are those of
+the whole suite so far.
+"""
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Iterable, Optional
+
+from stem import task_runner
+from stem.task_master import TaskMaster
+from stem.task_runner import TaskRunner
+from stem.trace import Span, TraceRecorder
+
+from .dag import Cost, build
+
+VERSION = 1
+PERCENTILES = 50, 90, 99
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # where ``benchmarks`` is importable
+
+
+def runners() -> dict[str, type[TaskRunner]]:
+    """Every concrete runner of ``stem.task_runner`` by short name, new runners included."""
+    found = {}
+    for name, cls in vars(task_runner).items():
+        if inspect.isclass(cls) and issubclass(cls, TaskRunner) and not inspect.isabstract(cls) \
+                and not name.startswith("_"):
+            found[name.removesuffix("Runner").lower()] = cls
+    return found
+
+
+@dataclass
+class Config:
+    shapes: tuple[str, ...] = ("wide", "deep", "diamond", "random")
+    runners: Optional[tuple[str, ...]] = None  # all of them
+    nodes: int = 32
+    repeat: int = 5
+    cost: Cost = field(default_factory=Cost)
+    seed: int = 0
+    isolate: bool = True  # every case in a fresh interpreter
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> "Config":
+        record = dict(record, cost=Cost(**record["cost"]), shapes=tuple(record["shapes"]))
+        if record["runners"] is not None:
+            record["runners"] = tuple(record["runners"])
+        return cls(**record)
+
+
+def percentiles(values: Iterable[float]) -> dict[str, float]:
+    values = sorted(values)
+    if not values:
+        return {}
+    result = {"mean": statistics.fmean(values)}
+    for p in PERCENTILES:
+        result[f"p{p}"] = values[min(len(values) - 1, round(p / 100 * (len(values) - 1)))]
+    return result
+
+
+def idle_time(spans: list[Span], start: float, end: float) -> float:
+    """Time between ``start`` and ``end`` when no span was running."""
+    idle, covered = 0.0, start
+    for span in sorted(spans, key=lambda s: s.started):
+        if span.started > covered:
+            idle += span.started - covered
+        covered = max(covered, span.finished)
+    return idle + max(end - covered, 0.0)
+
+
+def peak_rss_kb() -> Optional[dict[str, int]]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def run_case(shape: str, runner_type: type[TaskRunner], config: Config) -> dict[str, Any]:
+    synthetic = build(shape, config.nodes, config.cost, config.seed)
+    recorder = TraceRecorder()
+    walls, waits, idle, busy = [], [], 0.0, 0.0
+    with runner_type(tracer=recorder) as runner:
+        task_master = TaskMaster(runner)
+        task_master.execute({}, synthetic.root, synthetic.workspace).data  # warm-up: pools, imports
+        for _ in range(config.repeat):
+            recorder.clear()
+            start = time.time()
+            task_master.execute({}, synthetic.root, synthetic.workspace).data
+            end = time.time()
+            walls.append(end - start)
+            waits.extend(span.queue_wait for span in recorder.spans)
+            idle += idle_time(recorder.spans, start, end)
+            busy += sum(span.run_time for span in recorder.spans)
+    total = sum(walls)
+    return {
+        "shape": shape,
+        "runner": runner_type.__name__,
+        "nodes": synthetic.size,
+        "runs": config.repeat,
+        "throughput": synthetic.size * config.repeat / total if total else None,
+        "latency": percentiles(walls),
+        "queue_wait": percentiles(waits),
+        "overhead": idle / total if total else None,
+        "parallelism": busy / total if total else None,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run_isolated(shape: str, name: str, config: Config) -> dict[str, Any]:
+    """:func:`run_case` of the runner named ``name`` in a fresh interpreter."""
+    command = [sys.executable, "-m", "benchmarks", "case", shape, name, json.dumps(asdict(config))]
+    process = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"case exited with {process.returncode}")
+    return json.loads(process.stdout)
+
+
+def commit() -> Optional[str]:
+    try:
+        process = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return process.stdout.strip() or None
+
+
+def run_suite(config: Config, log=None) -> dict[str, Any]:
+    """Run every case of the config, a failing case is reported with its error."""
+    available = runners()
+    names = config.runners or tuple(available)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"unknown runners {', '.join(unknown)}, expected some of {', '.join(available)}")
+    results = []
+    for shape in config.shapes:
+        for name in names:
+            try:
+                if config.isolate:
+                    result = run_isolated(shape, name, config)
+                else:
+                    result = run_case(shape, available[name], config)
+            except Exception as e:
+                result = {"shape": shape, "runner": available[name].__name__, "error": repr(e)}
+            if log is not None:
+                print(format_result(result), file=log, flush=True)
+            results.append(result)
+    config_record = asdict(config)
+    config_record["runners"] = list(names)
+    return {
+        "version": VERSION,
+        "commit": commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config_record,
+        "results": results,
+    }
+
+
+def format_result(result: dict[str, Any]) -> str:
+    head = f"{result['shape']:<8} {result['runner']:<18}"
+    if "error" in result:
+        return f"{head} error {result['error']}"
+    return (f"{head} {result['throughput']:>10.1f} nodes/s  p50 {result['latency']['p50'] * 1e3:>8.2f} ms  "
+            f"p99 {result['latency']['p99'] * 1e3:>8.2f} ms  overhead {result['overhead']:>6.1%}  "
+            f"parallelism {result['parallelism']:>5.2f}")
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> list[dict[str, Any]]:
+    """Throughput and median latency of the cases present in both reports, new over old."""
+    before = {(r["shape"], r["runner"]): r for r in old["results"] if "error" not in r}
+    rows = []
+    for result in new["results"]:
+        if "error" in result or (previous := before.get((result["shape"], result["runner"]))) is None:
+            continue
+        rows.append({
+            "shape": result["shape"],
+            "runner": result["runner"],
+            "throughput": result["throughput"] / previous["throughput"],
+            "latency_p50": result["latency"]["p50"] / previous["latency"]["p50"],
+        })
+    return rows
@@ -0,0 +1,370 @@
+"""Caches of task results.
+
+According to the metadata processor principle a result depends only on the
+immutable data and the meta, so it is addressed by the task, the version of
+its code, the meta fingerprint and the keys of its dependencies.
+"""
+import inspect
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache, partial
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Hashable, Iterator, Optional, Union
+
+from .meta import Meta, get_meta_attr, meta_fingerprint
+from .task import Task
+
+MISSING = object()
+
+
+class ResultCache(ABC):
+
+    @abstractmethod
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        pass
+
+    @abstractmethod
+    def put(self, key: Hashable, value: Any) -> Any:
+        """Store the value and return it in the form dependents should read.
+
+        Iterators are materialized, so a fresh iterator is returned in place
+        of the consumed one.
+        """
+        pass
+
+    def touch(self, key: Hashable):
+        """Mark an entry as part of the current execution without reading it."""
+        pass
+
+    def close(self):
+        pass
+
+
+def _source(code: Any) -> str:
+    try:
+        return inspect.getsource(code)
+    except (OSError, TypeError):
+        return getattr(code, "__qualname__", "")
+
+
+def _code_text(code: Any) -> str:
+    """Bytecode, names and constants of a code object, nested code included, stable across processes."""
+    consts = [_code_text(c) if inspect.iscode(c) else repr(c) for c in code.co_consts]
+    return f"{code.co_code.hex()}|{code.co_names}|{consts}"
+
+
+def describe(value: Any, seen: Optional[set[int]] = None) -> str:
+    """Stable text of a task parameter.
+
+    Functions are described by their source, bytecode and closure, arrays
+    and buffers by a digest of their contents; an object met again inside
+    itself, as a recursive function in its own closure, only by its name.
+    """
+    if isinstance(value, Task):
+        return f"task:{value.name}"  # dependencies are part of the result key
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"{type(value).__name__}:{sha256(value).hexdigest()}"
+    if hasattr(value, "__array_interface__") and getattr(value.dtype, "hasobject", False) is False:
+        return f"array({value.dtype.str}, {value.shape}, {sha256(value.tobytes()).hexdigest()})"
+    composite = isinstance(value, (partial, list, tuple, dict, set, frozenset)) or \
+        hasattr(value, "__code__") or hasattr(value, "__array_interface__")
+    if not composite:
+        return repr(value)
+
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return f"cycle:{getattr(value, '__qualname__', type(value).__qualname__)}"
+    seen.add(id(value))
+    try:
+        if isinstance(value, partial):
+            return f"partial({describe(value.func, seen)}, {[describe(a, seen) for a in value.args]}, " \
+                   f"{ {k: describe(v, seen) for k, v in value.keywords.items()} })"
+        if (code := getattr(value, "__code__", None)) is not None:
+            closure = [describe(cell.cell_contents, seen) for cell in value.__closure__ or ()]
+            return f"{value.__module__}.{value.__qualname__}|{_source(value)}|{_code_text(code)}|{closure}"
+        if isinstance(value, (set, frozenset)):
+            return f"{type(value).__name__}({sorted(describe(v, seen) for v in value)})"
+        if isinstance(value, dict):
+            return f"{ {k: describe(v, seen) for k, v in value.items()} }"
+        if hasattr(value, "__array_interface__"):
+            return f"array(object, {value.shape}, {describe(value.tolist(), seen)})"
+        return f"{type(value).__name__}({[describe(v, seen) for v in value]})"
+    finally:
+        seen.discard(id(value))
+
+@lru_cache(maxsize=None)
+def task_version(task: Task) -> str:
+    """Digest of the code of the task.
+
+    A function task is versioned by its function; a task instance of a class
+    by the class source and its parameters, functions given to it included,
+    so two ``MapTask`` of different functions never share results.
+    """
+    task = getattr(task, "_task", task)
+    if (func := getattr(task, "_func", None)) is not None:
+        source = describe(func)
+    else:
+        parameters = {
+            name: describe(value) for name, value in sorted(vars(task).items())
+            if name not in ("dependencies", "_stem_workspace")
+        }
+        source = f"{_source(type(task))}|{parameters}"
+    return sha256(source.encode("utf8")).hexdigest()
+
+
+def task_path(task: Task) -> str:
+    """Identity of the task; instances of one task class are told apart by their parameters."""
+    inner = getattr(task, "_task", task)
+    if (qualname := getattr(inner, "__qualname__", None)) is not None:
+        return f"{inner.__module__}.{qualname}:{task.name}"
+    return f"{type(inner).__module__}.{type(inner).__qualname__}:{task.name}@{task_version(inner)[:16]}"
+
+
+def result_key(task: Task, meta: Meta, dependencies: tuple[Optional[str], ...] = ()) -> Optional[str]:
+    """Content address of a task result, None when it cannot be cached.
+
+    A task opts out of caching with ``cache=False`` in its settings.
+    """
+    if get_meta_attr(task.settings or {}, "cache", True) is False:
+        return None
+    fingerprint = meta_fingerprint(meta)
+    if fingerprint is None or None in dependencies:
+        return None
+    parts = task_path(task), task_version(task), fingerprint, *dependencies
+    return sha256("\0".join(parts).encode("utf8")).hexdigest()
+
+
+class _Stored:
+    """Stored form of a result, remembering whether it was an iterator."""
+
+    def __init__(self, value: Any):
+        self.is_iterator = isinstance(value, Iterator)
+        self.value = list(value) if self.is_iterator else value
+
+    def restore(self) -> Any:
+        return iter(self.value) if self.is_iterator else self.value
+
+
+class DiskCache(ResultCache):
+    """Results pickled into a local directory, evicted least recently used first.
+
+    ``index.json`` keeps the size and the last access time of every entry;
+    the oldest entries are removed once the total size exceeds ``max_size``.
+    Reads only update the index in memory; it is merged with the index on
+    disk, so entries of other processes sharing the directory are kept, and
+    saved on put, clear and close.
+    """
+    INDEX = "index.json"
+
+    def __init__(self, directory: Union[str, Path], max_size: int = 1 << 30):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: dict[str, list] = self._load_index()
+        self._removed: set[str] = set()
+        self._dirty = False
+
+    @property
+    def size(self) -> int:
+        return sum(size for size, _ in self._index.values())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def _load_index(self) -> dict[str, list]:
+        try:
+            with open(self.directory / self.INDEX) as index:
+                return json.load(index)
+        except (OSError, ValueError):
+            return {}
+
+    def _merge_index(self):
+        """Take in the entries other processes added, keeping the latest access times."""
+        for key, (size, accessed) in self._load_index().items():
+            if key in self._removed:
+                continue
+            if (entry := self._index.get(key)) is not None:
+                entry[1] = max(entry[1], accessed)
+            elif self._path(key).exists():
+                self._index[key] = [size, accessed]
+
+    def _save_index(self):
+        tmp = self.directory / f"{self.INDEX}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as index:
+            json.dump(self._index, index)
+        os.replace(tmp, self.directory / self.INDEX)
+        self._removed.clear()
+        self._dirty = False
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        with self._lock:
+            try:
+                with open(self._path(key), "rb") as file:
+                    data = file.read()
+                stored = pickle.loads(data)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                if self._index.pop(key, None) is not None:
+                    self._removed.add(key)
+                    self._dirty = True
+                return default
+            self._index[key] = [len(data), time.time()]  # possibly written by another process
+            self._dirty = True
+        return stored.restore()
+
+    def put(self, key: str, value: Any) -> Any:
+        stored = _Stored(value)
+        data = pickle.dumps(stored, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            tmp = self._path(key).with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, self._path(key))
+            self._index[key] = [len(data), time.time()]
+            self._removed.discard(key)
+            self._merge_index()
+            self._evict()
+            self._save_index()
+        return stored.restore()
+
+    def _evict(self):
+        total = self.size
+        for key in sorted(self._index, key=lambda k: self._index[k][1]):
+            if total <= self.max_size:
+                break
+            total -= self._index.pop(key)[0]
+            self._removed.add(key)
+            self._path(key).unlink(missing_ok=True)
+
+    def close(self):
+        """Save the access times of the reads since the last put."""
+        with self._lock:
+            if self._dirty:
+                self._merge_index()
+                self._save_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def clear(self):
+        with self._lock:
+            self._merge_index()
+            for key in self._index:
+                self._path(key).unlink(missing_ok=True)
+            self._removed.update(self._index)
+            self._index = {}
+            self._save_index()
+
+
+def approximate_size(value: Any) -> int:
+    """Bytes held by a result: buffer size of arrays, deep ``getsizeof`` of containers."""
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(map(approximate_size, value))
+    return size
+
+
+class MemoryCache(ResultCache):
+    """Materialized results kept in memory within an approximate byte budget.
+
+    The least recently used entries are evicted first; a value larger than
+    the whole budget is not kept.
+    """
+
+    def __init__(self, max_bytes: int = 256 << 20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[_Stored, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "entries": len(self._entries), "bytes": self.size,
+        }
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry[0].restore()
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        stored = _Stored(value)
+        size = approximate_size(stored.value)
+        with self._lock:
+            if (old := self._entries.pop(key, None)) is not None:
+                self.size -= old[1]
+            if size <= self.max_bytes:
+                self._entries[key] = stored, size
+                self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+        return stored.restore()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class RunResults(ResultCache):
+    """Results of one execution, reusing those retained by a previous one.
+
+    Only entries of the current execution graph are carried over, so results
+    of changed sub-trees are dropped. Misses fall through to ``cache``.
+    """
+
+    def __init__(self, previous: Optional["RunResults"] = None, cache: Optional[ResultCache] = None):
+        self.cache = cache
+        self.reused = 0
+        self._previous = previous._entries if previous is not None else {}
+        self._entries: dict[Hashable, _Stored] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def touch(self, key: Hashable):
+        if key not in self._entries and (stored := self._previous.get(key)) is not None:
+            self._entries[key] = stored
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        if (stored := self._entries.get(key)) is not None:
+            self.reused += key in self._previous
+            return stored.restore()
+        if self.cache is not None and (value := self.cache.get(key)) is not MISSING:
+            return self.put(key, value)
+        return default
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        if self.cache is not None:
+            value = self.cache.put(key, value)
+        stored = self._entries[key] = _Stored(value)
+        return stored.restore()
@@ -0,0 +1,61 @@
+"""Cooperative cancellation of running tasks.
+
+A runner cancels the token of an execution on its first failure. Long
+running tasks call :func:`check_cancelled` (or wait on
+``current_token()``) from time to time to stop early.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class Cancelled(Exception):
+    pass
+
+
+class CancellationToken:
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[BaseException] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: Optional[BaseException] = None):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep until cancelled or timed out, True if cancelled."""
+        return self._event.wait(timeout)
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled("execution was cancelled") from self.reason
+
+
+_NEVER = CancellationToken()
+_current: ContextVar[CancellationToken] = ContextVar("stem_cancellation_token", default=_NEVER)
+
+
+def current_token() -> CancellationToken:
+    """Token of the execution the calling task belongs to."""
+    return _current.get()
+
+
+def check_cancelled():
+    _current.get().check()
+
+
+@contextmanager
+def cancellation(token: CancellationToken) -> Iterator[CancellationToken]:
+    """Make the token current for the code run inside the block."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
@@ -3,9 +3,9 @@ import importlib.util
 import json
 from pathlib import Path
 import sys
+from typing import Iterator
 
-from stem.task_master import TaskMaster, TaskStatus
-
+from stem import manifest
 from stem.workspace import IWorkspace, TaskPath
 
 
@@ -29,6 +29,32 @@ def create_parser() -> argparse.ArgumentParser:
         '-m', '--meta',
         help = 'Metadata for task or path to file with metadata in JSON format'
     )
+    subparser_run.add_argument(
+        '-t', '--trace',
+        help = 'Write Chrome trace of the run into the file and print a summary of the tasks to stderr'
+    )
+
+    subparser_sweep = subparsers.add_parser('sweep', help = 'Run task for every point of a parameter sweep')
+    subparser_sweep.set_defaults(func = execute_sweep)
+    subparser_sweep.add_argument('TASKPATH')
+    subparser_sweep.add_argument(
+        '-m', '--meta',
+        help = 'Base metadata or path to file with metadata in JSON format'
+    )
+    points = subparser_sweep.add_mutually_exclusive_group(required = True)
+    points.add_argument(
+        '-g', '--grid',
+        help = 'Axes as JSON object of dotted meta paths to lists of values, or path to such file'
+    )
+    points.add_argument(
+        '-p', '--points',
+        help = 'JSON list of points (dotted meta paths to values), or path to JSON or JSON lines file'
+    )
+    subparser_sweep.add_argument('-o', '--output', help = 'JSON lines file for results, stdout by default')
+    subparser_sweep.add_argument('-j', '--workers', type = int,
+                                 help = 'Number of points executed at once, 4 by default')
+    subparser_sweep.add_argument('--max-in-flight', type = int,
+                                 help = 'Number of points read ahead, twice the workers by default')
 
     parser.add_argument(
         '-w', '--workspace',
@@ -64,29 +90,94 @@ def print_structure(args: argparse.Namespace):
             else:
                 print('\t' * (indent + 1) + str(value))
 
-    workspace = get_workspace(args)
-    pretty(workspace.structure())
+    pretty(get_manifest(args)["structure"])
+
+
+def get_manifest(args: argparse.Namespace) -> dict:
+    """Manifest of the workspace file, which is imported only when the manifest is stale.
+
+    The imported workspace is kept in ``args.loaded_workspace``.
+    """
+    def load() -> IWorkspace:
+        args.loaded_workspace = get_workspace(args)
+        return args.loaded_workspace
+
+    return manifest.get_manifest(args.workspace, load)
+
+
+def load_json(value: str):
+    """JSON given inline or as path to a file."""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        with open(value) as file:
+            return json.load(file)
+
+
+def iter_points(value: str) -> Iterator[dict]:
+    """Points given inline as JSON list, or as path to JSON list or JSON lines file read lazily."""
+    try:
+        yield from json.loads(value)
+        return
+    except json.JSONDecodeError:
+        pass
+    with open(value) as file:
+        if value.endswith(".jsonl"):
+            yield from (json.loads(line) for line in file if line.strip())
+        else:
+            yield from json.load(file)
+
+
+def find_task(args: argparse.Namespace):
+    workspace_manifest = get_manifest(args)
+    if str(TaskPath(args.TASKPATH)) not in workspace_manifest["tasks"]:
+        name = workspace_manifest["structure"]["name"]
+        raise ValueError(f"task '{args.TASKPATH}' was not found in workspace '{name}'")
+    workspace = getattr(args, "loaded_workspace", None) or get_workspace(args)
+    return workspace, workspace.find_task(TaskPath(args.TASKPATH))
 
 
 def execute_task_master_execute(args: argparse.Namespace):
-    workspace = get_workspace(args)
-    task = workspace.find_task(TaskPath(args.TASKPATH))
-    if task is None:
-        raise ValueError(f"task '{args.TASKPATH}' was not found in workspace '{workspace.name}'")
-    if args.meta is None:
-        meta = {}
-    else:
-        try:
-            meta = json.loads(args.meta)
-        except json.JSONDecodeError:
-            with open(args.meta) as metafile:
-                meta = json.load(metafile)
+    from stem.task_master import TaskMaster, TaskStatus
+
+    workspace, task = find_task(args)
+    meta = {} if args.meta is None else load_json(args.meta)
 
-    pre_res = TaskMaster().execute(meta, task, workspace)
+    recorder = None
+    task_master = TaskMaster()
+    if getattr(args, "trace", None) is not None:
+        from stem.task_runner import SimpleRunner
+        from stem.trace import TraceRecorder
+        recorder = TraceRecorder()
+        task_master = TaskMaster(SimpleRunner(tracer=recorder))
+
+    pre_res = task_master.execute(meta, task, workspace)
     if pre_res.status == TaskStatus.CONTAINS_DATA:
         print(pre_res.lazy_data())
     else:
         print(pre_res)
+    if recorder is not None:
+        with open(args.trace, "w") as file:
+            recorder.write_chrome_trace(file)
+        print(recorder.format_summary(), file=sys.stderr)
+
+def execute_sweep(args: argparse.Namespace):
+    from stem import sweep
+    from stem.task_master import TaskMaster
+
+    workspace, task = find_task(args)
+    meta = {} if args.meta is None else load_json(args.meta)
+    points = sweep.grid(load_json(args.grid)) if args.grid is not None else iter_points(args.points)
+
+    with TaskMaster() as task_master:
+        results = sweep.sweep(task_master, task, points, meta, workspace, args.workers or sweep.WORKERS,
+                              args.max_in_flight)
+        if args.output is None:
+            sweep.write_jsonl(results, sys.stdout)
+        else:
+            with open(args.output, "w") as output:
+                sweep.write_jsonl(results, output)
+
 
 if __name__ == "__main__":
     stem_cli_main()
\ No newline at end of file
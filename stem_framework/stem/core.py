@@ -1,5 +1,4 @@
-from typing import Optional
-from typing_extensions import Protocol
+from typing import Optional, Protocol
 import dataclasses
 import re
 def pascal_case_to_snake_case(name: str) -> str:
@@ -25,5 +24,5 @@ class Dataclass(Protocol):
     a: int=0
     b: float=1.0
     c: list = dataclasses.field(default_factory=list)
-    name=Optional[str]='dict'
+    name: Optional[str] = 'dict'
     
\ No newline at end of file
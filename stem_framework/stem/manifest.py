@@ -0,0 +1,86 @@
+"""Manifest of a workspace file, so commands that only inspect it skip the import.
+
+The manifest holds the structure of the workspace and the dependencies and
+specification of every task path. It is written into ``__pycache__`` next
+to the source on first load and used while the modification time and size,
+or else the content hash, of the source match. Changes of modules imported
+by the workspace file are not noticed.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+from .workspace import IWorkspace
+
+VERSION = 1
+
+
+def manifest_path(source: Union[str, Path]) -> Path:
+    source = Path(source)
+    return source.parent / "__pycache__" / f"{source.stem}.stem-manifest.json"
+
+
+def _digest(source: Path) -> str:
+    return hashlib.sha256(source.read_bytes()).hexdigest()
+
+
+def build_manifest(workspace: IWorkspace, source: Union[str, Path]) -> dict[str, Any]:
+    source = Path(source)
+    stat = source.stat()
+    tasks = {}
+    for path, task in workspace._index()[0].items():
+        tasks[path] = {
+            "name": task.name,
+            "dependencies": [d if isinstance(d, str) else d.name for d in task.dependencies],
+            "specification": None if task.specification is None else repr(task.specification),
+        }
+    return {
+        "version": VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": _digest(source),
+        "structure": workspace.structure(),
+        "tasks": tasks,
+    }
+
+
+def load_manifest(source: Union[str, Path]) -> Optional[dict[str, Any]]:
+    """The stored manifest of the source, None if missing or stale."""
+    source = Path(source)
+    try:
+        with open(manifest_path(source)) as file:
+            manifest = json.load(file)
+        stat = source.stat()
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != VERSION:
+        return None
+    if (manifest["mtime_ns"], manifest["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return manifest
+    if manifest["sha256"] == _digest(source):
+        manifest["mtime_ns"], manifest["size"] = stat.st_mtime_ns, stat.st_size
+        save_manifest(source, manifest)
+        return manifest
+    return None
+
+
+def save_manifest(source: Union[str, Path], manifest: dict[str, Any]):
+    path = manifest_path(source)
+    try:
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as file:
+            json.dump(manifest, file)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only location, the workspace is imported every time
+
+
+def get_manifest(source: Union[str, Path], load_workspace: Callable[[], IWorkspace]) -> dict[str, Any]:
+    """The manifest of the source, importing the workspace only when it is stale."""
+    if (manifest := load_manifest(source)) is None:
+        manifest = build_manifest(load_workspace(), source)
+        save_manifest(source, manifest)
+    return manifest
@@ -0,0 +1,156 @@
+"""Memory accounting of task nodes with tracemalloc.
+
+A node is measured when its task declares ``memory_limit`` (bytes) in its
+settings, when its runner's tracer asks for memory, or while a report is
+open (see :func:`reporting`, used by ``TaskMaster(measure_memory=True)``).
+tracemalloc is started by the first meter and stopped when the last one
+exits, unless it was already running.
+
+The meters of a process share the peak of tracemalloc: it is read and
+reset only when a meter enters or exits and by one poller thread checking
+the limits, and every reading goes to all the meters open at that time.
+A node measured alone gets its exact figures. tracemalloc counts the
+allocations of every thread of a process, so nodes running at the same
+time on a thread pool add to each other's figures and limits; process
+workers and :class:`~stem.task_runner.SimpleRunner` measure one node at a
+time. Memory allocated by extensions that do not report to tracemalloc is
+not seen.
+"""
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from .cancel import CancellationToken
+from .meta import get_meta_attr
+from .task import Task
+
+
+@dataclass
+class MemoryUsage:
+    peak: int  # most bytes allocated at once over the start
+    retained: int  # bytes still allocated at the end, the result included
+
+
+class MemoryLimitExceeded(MemoryError):
+    pass
+
+
+def memory_limit(task: Task) -> Optional[int]:
+    """Ceiling in bytes declared by ``memory_limit`` in the task settings."""
+    return get_meta_attr(task.settings or {}, "memory_limit", None)
+
+
+class MemoryMeter:
+    """Allocations made inside the block.
+
+    With a limit and a token, the token is cancelled with
+    :class:`MemoryLimitExceeded` as soon as the peak passes the limit, so
+    tasks checking it stop early.
+    """
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, name: str, limit: Optional[int] = None, token: Optional[CancellationToken] = None):
+        self.name = name
+        self.limit = limit
+        self.token = token
+        self.usage: Optional[MemoryUsage] = None
+        self._base = 0
+        self._peak = 0
+
+    @property
+    def watched(self) -> bool:
+        return self.limit is not None and self.token is not None
+
+    def exceeded(self, peak: int) -> MemoryLimitExceeded:
+        return MemoryLimitExceeded(f"task {self.name} allocated {peak} bytes, over its limit of {self.limit}")
+
+    def __enter__(self) -> "MemoryMeter":
+        global _owner, _poller
+        with _lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _owner = True
+            over = _sample()
+            self._base = tracemalloc.get_traced_memory()[0]
+            self._peak = 0
+            _active.add(self)
+            if self.watched and _poller is None:
+                _poller = threading.Thread(target=_poll, name="stem-memory", daemon=True)
+                _poller.start()
+        _cancel(over)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _owner
+        with _lock:
+            over = _sample()
+            _active.discard(self)
+            self.usage = MemoryUsage(self._peak, tracemalloc.get_traced_memory()[0] - self._base)
+            if not _active and _owner:
+                tracemalloc.stop()
+                _owner = False
+        _cancel(m for m in over if m is not self)
+
+
+_lock = threading.Lock()
+_active: set[MemoryMeter] = set()
+_poller: Optional[threading.Thread] = None
+_owner = False  # tracemalloc was started by a meter
+
+
+def _sample() -> list[MemoryMeter]:
+    """Give the peak since the last sample to every open meter, return the meters over their limit.
+
+    Called with the lock held, the only place the peak is reset.
+    """
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    over = []
+    for meter in _active:
+        meter._peak = max(meter._peak, peak - meter._base)
+        if meter.watched and meter._peak > meter.limit:
+            over.append(meter)
+    return over
+
+
+def _cancel(meters: Iterable[MemoryMeter]):
+    for meter in meters:
+        meter.token.cancel(meter.exceeded(meter._peak))
+
+
+def _poll():
+    global _poller
+    while True:
+        time.sleep(MemoryMeter.POLL_INTERVAL)
+        with _lock:
+            if not any(meter.watched for meter in _active):
+                _poller = None
+                return
+            over = _sample()
+        _cancel(over)
+
+
+_report: ContextVar[Optional[dict[str, MemoryUsage]]] = ContextVar("stem_memory_report", default=None)
+
+
+@contextmanager
+def reporting(report: dict[str, MemoryUsage]) -> Iterator[dict[str, MemoryUsage]]:
+    """Collect the usage of every node measured inside the block into the report, by node name."""
+    reset = _report.set(report)
+    try:
+        yield report
+    finally:
+        _report.reset(reset)
+
+
+def is_reporting() -> bool:
+    return _report.get() is not None
+
+
+def report(name: str, usage: MemoryUsage):
+    if (current := _report.get()) is not None:
+        current[name] = usage
@@ -4,8 +4,8 @@ According principle of metadata processor, during the
 processing of data, only data (immutable initial data in any textual or binary format) and metadata) are allowed to be used as input, meaning no user instructions (scripts) or
 manually managed intermediate states are possible."""
 
-from dataclasses import dataclass, is_dataclass
-from typing import Optional, Any, Tuple, Type, Union
+from dataclasses import dataclass, is_dataclass, fields
+from typing import Optional, Any, Tuple, Type, Union, Hashable
 from stem.core import Dataclass 
 
 Meta = Union[dict,Dataclass]
@@ -83,7 +83,7 @@ def get_meta_attr(meta : Meta, key : str, default : Optional[Any] = None) -> Opt
     if type(meta)==dict:
         try:
             return (meta[key])
-        except KeyError():
+        except KeyError:
             return (default)
     else:
         try:
@@ -98,3 +98,77 @@ def update_meta(meta: Meta, **kwargs):
         for k,a in kwargs.items():
             setattr(meta, k, a)
 
+
+class _Identity:
+    __slots__ = "value",
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and other.value is self.value
+
+    def __hash__(self):
+        return id(self.value)
+
+
+def freeze_meta(meta: Any) -> Hashable:
+    """Hashable form of a meta tree: equal metas give equal frozen values.
+
+    Unhashable leaves are compared by identity.
+    """
+    if isinstance(meta, dict):
+        items = ((key, freeze_meta(value)) for key, value in meta.items())
+        return "dict", tuple(sorted(items, key=lambda item: repr(item[0])))
+    if is_dataclass(meta) and not isinstance(meta, type):
+        return type(meta).__qualname__, freeze_meta({f.name: getattr(meta, f.name) for f in fields(meta)})
+    if isinstance(meta, (list, tuple)):
+        return "list", tuple(freeze_meta(value) for value in meta)
+    try:
+        hash(meta)
+    except TypeError:
+        return _Identity(meta)
+    return type(meta).__name__, meta
+
+
+_STABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def _is_stable(frozen: Hashable) -> bool:
+    if isinstance(frozen, tuple):
+        return all(map(_is_stable, frozen))
+    return isinstance(frozen, _STABLE_TYPES)
+
+
+def meta_fingerprint(meta: Any) -> Optional[str]:
+    """Digest of a meta tree that is stable across processes.
+
+    None when the meta holds values that have no stable representation.
+    """
+    frozen = freeze_meta(meta)
+    if not _is_stable(frozen):
+        return None
+    from hashlib import sha256
+    return sha256(repr(frozen).encode("utf8")).hexdigest()
+
+
+def _as_dict(meta: Any) -> Optional[dict]:
+    if isinstance(meta, dict):
+        return meta
+    if is_dataclass(meta) and not isinstance(meta, type):
+        return {f.name: getattr(meta, f.name) for f in fields(meta)}
+    return None
+
+
+def diff_meta(old: Meta, new: Meta, prefix: str = "") -> set[str]:
+    """Dotted paths of the meta sub-trees that differ between two metas."""
+    old_dict, new_dict = _as_dict(old), _as_dict(new)
+    if old_dict is None or new_dict is None:
+        return set() if freeze_meta(old) == freeze_meta(new) else {prefix.rstrip(".")}
+    changed = set()
+    for key in old_dict.keys() | new_dict.keys():
+        if key not in old_dict or key not in new_dict:
+            changed.add(prefix + str(key))
+        else:
+            changed |= diff_meta(old_dict[key], new_dict[key], f"{prefix}{key}.")
+    return changed
@@ -0,0 +1,223 @@
+"""Data-parallel helpers running element-wise work and reductions on a process pool."""
+import atexit
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import reduce
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+CHUNK_SIZE = 1024  # input of unknown length
+MAX_CHUNK_SIZE = 1 << 16
+CHUNKS_PER_WORKER = 4
+
+_EMPTY = object()
+
+MAX_WORKERS = os.cpu_count() or 1  # workers of the shared pool, set before its first use
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_provider: ContextVar[Optional[Callable[[], Executor]]] = ContextVar("stem_pool_provider", default=None)
+
+
+@contextmanager
+def pool_provider(provider: Callable[[], Executor]) -> Iterator[None]:
+    """Make the helpers called in the block run on the executor returned by ``provider``, such as a runner pool."""
+    token = _provider.set(provider)
+    try:
+        yield
+    finally:
+        _provider.reset(token)
+
+
+def get_pool() -> Executor:
+    """Executor of the helpers called without one.
+
+    It is the executor of the enclosing :func:`pool_provider`, otherwise a
+    process pool of ``MAX_WORKERS`` shared by this process, created on first
+    use and shut down at exit.
+    """
+    if (provider := _provider.get()) is not None:
+        return provider()
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(MAX_WORKERS)
+        return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    """Shut the shared process pool down, the next use creates a new one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _workers(executor: Optional[Executor]) -> int:
+    return getattr(executor, "_max_workers", None) or MAX_WORKERS
+
+
+def chunk_size_for(iterable: Iterable, workers: int) -> int:
+    """Chunk size giving every worker a few chunks of a sized input, ``CHUNK_SIZE`` for other inputs."""
+    try:
+        size = len(iterable)
+    except TypeError:
+        return CHUNK_SIZE
+    return min(max(-(-size // (CHUNKS_PER_WORKER * workers)), 1), MAX_CHUNK_SIZE)
+
+
+def iter_batches(iterable: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _map_batch(func: Callable[[T], R], batch: list[T]) -> list[R]:
+    return list(map(func, batch))
+
+
+def parallel_map(func: Callable[[T], R], iterable: Iterable[T], chunk_size: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, executor: Optional[Executor] = None) -> Iterator[R]:
+    """Lazy map of ``func`` over chunks of the iterable on a process pool.
+
+    Results come in input order. At most ``max_in_flight`` chunks (twice the
+    workers by default) are submitted ahead of the consumer, so the input
+    is read only as fast as results are taken. ``func`` must be picklable.
+    The chunk size defaults to :func:`chunk_size_for` the input. The
+    executor is taken from :func:`get_pool` on the call, not on the first
+    read.
+    """
+    executor = executor or get_pool()
+    chunk_size = chunk_size or chunk_size_for(iterable, _workers(executor))
+    max_in_flight = max_in_flight or 2 * _workers(executor)
+    return _parallel_map(func, iterable, chunk_size, max_in_flight, executor)
+
+
+def _parallel_map(func: Callable[[T], R], iterable: Iterable[T], chunk_size: int, max_in_flight: int,
+                  executor: Executor) -> Iterator[R]:
+    in_flight: deque[Future] = deque()
+    try:
+        for batch in iter_batches(iterable, chunk_size):
+            in_flight.append(executor.submit(_map_batch, func, batch))
+            if len(in_flight) >= max_in_flight:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def _reduce_batch(func: Callable[[R, R], R], batch: list[R]) -> R:
+    return reduce(func, batch)
+
+
+def iter_reduce(func: Callable[[R, R], R], iterable: Iterable[R], chunk_size: Optional[int] = None,
+                commutative: bool = False, max_in_flight: Optional[int] = None,
+                executor: Optional[Executor] = None) -> Iterator[R]:
+    """Running aggregates of an associative ``func``.
+
+    Chunks are reduced in parallel on a process pool and their partial
+    results are folded into the aggregate on the calling thread as they
+    arrive, the aggregate of the input seen so far being yielded after every
+    fold. Partials of a commutative ``func`` are folded in completion order,
+    otherwise in input order. Use :func:`tree_reduce` for the result alone.
+    The executor is taken on the call, as in :func:`parallel_map`.
+    """
+    executor = executor or get_pool()
+    chunk_size = chunk_size or chunk_size_for(iterable, _workers(executor))
+    max_in_flight = max_in_flight or 2 * _workers(executor)
+    return _iter_reduce(func, iterable, chunk_size, commutative, max_in_flight, executor)
+
+
+def _iter_reduce(func: Callable[[R, R], R], iterable: Iterable[R], chunk_size: int, commutative: bool,
+                 max_in_flight: int, executor: Executor) -> Iterator[R]:
+    in_flight: deque[Future] = deque()
+    aggregate = _EMPTY
+
+    def fold() -> R:
+        nonlocal aggregate
+        if commutative:
+            wait(in_flight, return_when=FIRST_COMPLETED)
+            future = next(f for f in in_flight if f.done())
+            in_flight.remove(future)
+        else:
+            future = in_flight.popleft()
+        partial = future.result()
+        aggregate = partial if aggregate is _EMPTY else func(aggregate, partial)
+        return aggregate
+
+    try:
+        for batch in iter_batches(iterable, chunk_size):
+            in_flight.append(executor.submit(_reduce_batch, func, batch))
+            if len(in_flight) >= max_in_flight:
+                yield fold()
+        while in_flight:
+            yield fold()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def tree_reduce(func: Callable[[R, R], R], iterable: Iterable[R], chunk_size: Optional[int] = None,
+                commutative: bool = False, max_in_flight: Optional[int] = None,
+                executor: Optional[Executor] = None) -> R:
+    """Reduction of the iterable by an associative ``func`` as a tree on a process pool.
+
+    Chunks are reduced in parallel, and two finished partial results are
+    combined on the pool as soon as they are adjacent in the input, or at
+    once for a commutative ``func``; at most ``max_in_flight`` chunks are
+    read ahead.
+    """
+    executor = executor or get_pool()
+    chunk_size = chunk_size or chunk_size_for(iterable, _workers(executor))
+    max_in_flight = max_in_flight or 2 * _workers(executor)
+    batches = iter_batches(iterable, chunk_size)
+    in_flight: dict[Future, tuple[int, int]] = {}  # span of chunk indices reduced by the future
+    done: dict[int, tuple[int, R]] = {}  # finished partials by first chunk index: last index, value
+    ends: dict[int, int] = {}  # first chunk index of the finished partials by last index
+    count = 0
+
+    def combine(first: int, last: int, value: R):
+        if commutative and done:
+            other = next(iter(done))
+        elif first - 1 in ends:
+            other = ends[first - 1]
+        elif last + 1 in done:
+            other = last + 1
+        else:
+            done[first] = last, value
+            ends[last] = first
+            return
+        other_last, other_value = done.pop(other)
+        del ends[other_last]
+        pair = [other_value, value] if other < first else [value, other_value]
+        in_flight[executor.submit(_reduce_batch, func, pair)] = min(first, other), max(last, other_last)
+
+    try:
+        while True:
+            while len(in_flight) < max_in_flight and (batch := next(batches, None)) is not None:
+                in_flight[executor.submit(_reduce_batch, func, batch)] = count, count
+                count += 1
+            if not in_flight:
+                break
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                first, last = in_flight.pop(future)
+                combine(first, last, future.result())
+    finally:
+        for future in in_flight:
+            future.cancel()
+    if not done:
+        raise TypeError("reduce() of empty iterable with no initial value")
+    (_, value), = done.values()
+    return value
@@ -5,6 +5,7 @@ from socketserver import StreamRequestHandler, TCPServer
 from typing import Optional
 
 from stem.envelope import Envelope
+from stem.cache import MemoryCache
 from stem.task_master import TaskMaster, TaskStatus
 from stem.task_runner import SimpleRunner
 from stem.task_tree import TaskTree
@@ -53,10 +54,11 @@ class UnitHandler(StreamRequestHandler):
 
 
 
-def start_unit(workspace: IWorkspace, host: str, port: int, powerfullity: Optional[int] = None):
+def start_unit(workspace: IWorkspace, host: str, port: int, powerfullity: Optional[int] = None,
+               memory_budget: int = 64 << 20):
     UnitHandler.workspace = workspace
-    UnitHandler.task_master = TaskMaster()
-    UnitHandler.task_tree = None
+    UnitHandler.task_tree = TaskTree()
+    UnitHandler.task_master = TaskMaster(task_tree=UnitHandler.task_tree, memory_cache=MemoryCache(memory_budget))
     UnitHandler.powerfullity = powerfullity
     return TCPServer((host, port), UnitHandler)
 
@@ -0,0 +1,83 @@
+"""Hand-off of large task results between processes through shared memory.
+
+A worker places a NumPy array or a bytes object into a
+``multiprocessing.shared_memory`` segment and returns only a small
+:class:`SharedResult` handle; the receiving process maps the same segment
+instead of unpickling a copy sent through a pipe.
+"""
+import sys
+import weakref
+from typing import Any, Optional
+
+SHARED_MEMORY_THRESHOLD = 64 * 1024  # 64 Kb
+
+
+def _segment(name: Optional[str] = None, create: bool = False, size: int = 0):
+    from multiprocessing.shared_memory import SharedMemory  # multiprocessing only when a process pool is used
+    return SharedMemory(name, create, size)
+
+
+class SharedResult:
+    ARRAY = "array"
+    BYTES = "bytes"
+
+    def __init__(self, name: str, kind: str, size: int, shape: tuple = (), dtype: str = ""):
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.shape = shape
+        self.dtype = dtype
+
+    def load(self) -> Any:
+        shm = _segment(self.name)
+        if self.kind == SharedResult.BYTES:
+            data = bytes(shm.buf[:self.size])
+            shm.close()
+            return data
+        import numpy as np
+        array = np.ndarray(self.shape, self.dtype, buffer=shm.buf)
+        weakref.finalize(array, shm.close)
+        return array
+
+    def unlink(self):
+        shm = _segment(self.name)
+        shm.close()
+        shm.unlink()
+
+
+def ensure_tracker():
+    """Start the resource tracker before forking workers so they inherit it."""
+    from multiprocessing import resource_tracker
+    resource_tracker.ensure_running()
+
+
+def _is_array(value: Any) -> bool:
+    np = sys.modules.get("numpy")
+    return np is not None and isinstance(value, np.ndarray) and not value.dtype.hasobject
+
+
+def share(value: Any, threshold: int = SHARED_MEMORY_THRESHOLD) -> Any:
+    """Copy a large array or bytes value into a new segment and return its handle.
+
+    Other values are returned unchanged. The segment is owned by the process
+    that receives the handle, which must ``unlink`` it. Processes exchanging
+    handles should share one resource tracker (see :func:`ensure_tracker`).
+    """
+    if _is_array(value) and value.nbytes >= threshold:
+        result = SharedResult("", SharedResult.ARRAY, value.nbytes, value.shape, value.dtype.str)
+        source = value.reshape(-1).view("B") if value.flags.c_contiguous else value.tobytes()
+    elif isinstance(value, (bytes, bytearray)) and len(value) >= threshold:
+        result = SharedResult("", SharedResult.BYTES, len(value))
+        source = value
+    else:
+        return value
+
+    shm = _segment(create=True, size=max(result.size, 1))
+    shm.buf[:result.size] = source
+    result.name = shm.name
+    shm.close()
+    return result
+
+
+def load(value: Any) -> Any:
+    return value.load() if isinstance(value, SharedResult) else value
@@ -0,0 +1,88 @@
+"""History of task costs used to schedule the execution graph.
+
+Wall time and output size of every executed task are kept per task and
+meta shape, i.e. the structure and value types of the meta without the
+values themselves, so that runs with other parameters reuse the estimates.
+"""
+import json
+import os
+import threading
+from dataclasses import is_dataclass, fields
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from .cache import task_path
+from .meta import Meta
+from .task import Task
+
+DEFAULT_TIME = 1.0
+
+
+def _shape(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _shape(v) for k, v in value.items()}
+    if is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _shape(getattr(value, f.name)) for f in fields(value)}
+    return type(value).__name__
+
+
+def meta_shape(meta: Meta) -> str:
+    data = json.dumps(_shape(meta), sort_keys=True)
+    return sha256(data.encode("utf8")).hexdigest()[:16]
+
+
+class StatsStore:
+    """Smoothed wall time and output size of tasks, saved as JSON into ``path``.
+
+    Without a path the statistics live only as long as the store.
+    """
+    SMOOTHING = 0.3
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, dict[str, float]]] = {}
+        if self.path is not None:
+            try:
+                with open(self.path) as file:
+                    self._entries = json.load(file)
+            except (OSError, ValueError):
+                pass
+
+    def record(self, task: Task, meta: Meta, seconds: float, size: Optional[int] = None):
+        with self._lock:
+            shapes = self._entries.setdefault(task_path(task), {})
+            entry = shapes.setdefault(meta_shape(meta), {"runs": 0, "time": seconds})
+            entry["time"] += (seconds - entry["time"]) * (self.SMOOTHING if entry["runs"] else 1)
+            if size is not None:
+                entry["size"] = size
+            entry["runs"] += 1
+
+    def get(self, task: Task, meta: Meta) -> Optional[dict[str, float]]:
+        shapes = self._entries.get(task_path(task), {})
+        return shapes.get(meta_shape(meta))
+
+    def estimate(self, task: Task, meta: Meta) -> float:
+        """Expected wall time of the task.
+
+        Falls back to the mean over other meta shapes of the task, then over
+        all known tasks, then to ``DEFAULT_TIME``.
+        """
+        shapes = self._entries.get(task_path(task), {})
+        if (entry := shapes.get(meta_shape(meta))) is not None:
+            return entry["time"]
+        if shapes:
+            return sum(e["time"] for e in shapes.values()) / len(shapes)
+        known = [e["time"] for s in self._entries.values() for e in s.values()]
+        return sum(known) / len(known) if known else DEFAULT_TIME
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as file:
+                json.dump(self._entries, file)
+            os.replace(tmp, self.path)
@@ -0,0 +1,120 @@
+"""Parameter sweeps: one task executed over many points of its meta.
+
+A point maps dotted meta paths to values, e.g. ``{"int_range.stop": 5}``,
+and is applied on top of a base meta. Points come from :func:`grid` or any
+iterable of such dicts and are read lazily.
+"""
+import json
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, is_dataclass, replace
+from itertools import product
+from typing import Any, Generic, Iterable, Iterator, Mapping, Optional, TextIO, Type, TypeVar
+
+from .meta import Meta, get_meta_attr
+from .task import Task
+from .task_master import TaskMaster, TaskResult, TaskStatus
+from .workspace import IWorkspace
+
+T = TypeVar("T")
+
+Point = dict[str, Any]
+
+WORKERS = 4
+
+
+def grid(axes: Mapping[str, Iterable[Any]]) -> Iterator[Point]:
+    """Points of the cartesian product of the axes, the last axis varying fastest."""
+    names = list(axes)
+    for values in product(*axes.values()):
+        yield dict(zip(names, values))
+
+
+def _set_path(meta: Meta, path: list[str], value: Any) -> Meta:
+    head, *rest = path
+    if rest:
+        value = _set_path(get_meta_attr(meta, head, {}), rest, value)
+    if is_dataclass(meta):
+        return replace(meta, **{head: value})
+    return {**meta, head: value}
+
+
+def apply_point(meta: Meta, point: Point) -> Meta:
+    """Copy of the meta with the values of the point; the meta itself is not changed."""
+    for path, value in point.items():
+        meta = _set_path(meta, path.split("."), value)
+    return meta
+
+
+@dataclass
+class SweepResult(Generic[T]):
+    index: int
+    point: Point
+    result: TaskResult[T]
+    value: Optional[T] = None  # evaluated data, iterators as lists
+
+    def to_record(self) -> dict[str, Any]:
+        record = {"index": self.index, "point": self.point, "status": self.result.status.name}
+        if self.result.status == TaskStatus.CONTAINS_DATA:
+            record["result"] = self.value
+        elif self.result.error is not None:
+            record["error"] = repr(self.result.error)
+        return record
+
+
+def _evaluate(index: int, point: Point, result: TaskResult[T]) -> SweepResult[T]:
+    value = None
+    if result.status == TaskStatus.CONTAINS_DATA:
+        try:
+            value = result.data
+            if isinstance(value, Iterator):
+                value = list(value)
+        except Exception:
+            pass  # kept in result.status and result.error
+    return SweepResult(index, point, result, value)
+
+
+def sweep(task_master: TaskMaster, task: Task[T], points: Iterable[Point], base: Optional[Meta] = None,
+          workspace: Optional[Type[IWorkspace]] = None, workers: int = WORKERS,
+          max_in_flight: Optional[int] = None) -> Iterator[SweepResult[T]]:
+    """Execute the task for every point on a pool of ``workers`` threads.
+
+    Results come in completion order. At most ``max_in_flight`` points
+    (twice the workers by default) are taken from ``points`` ahead of the
+    consumer. A failing point is reported in its result and does not stop
+    the sweep.
+    """
+    base = {} if base is None else base
+    max_in_flight = max_in_flight or 2 * workers
+    in_flight: set[Future] = set()
+    with ThreadPoolExecutor(workers, thread_name_prefix="stem-sweep") as executor:
+        try:
+            for index, point in enumerate(points):
+                result = task_master.execute(apply_point(base, point), task, workspace)
+                in_flight.add(executor.submit(_evaluate, index, point, result))
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, Iterator):
+        return list(value)
+    if hasattr(value, "tolist"):  # numpy arrays and scalars
+        return value.tolist()
+    return repr(value)
+
+
+def write_jsonl(results: Iterable[SweepResult], file: TextIO) -> int:
+    """Write one JSON record per result as it arrives, return the number of records."""
+    count = 0
+    for result in results:
+        file.write(json.dumps(result.to_record(), default=_jsonable) + "\n")
+        file.flush()
+        count += 1
+    return count
@@ -1,13 +1,26 @@
 
-from typing import TypeVar, Union, Tuple, Callable, Optional, Generic, Any, Iterator
+from typing import TypeVar, Union, Tuple, Callable, Optional, Generic, Any, Iterator, Iterable, TYPE_CHECKING
 from abc import ABC, abstractmethod
 from .core import Named
-from .meta import Specification, Meta
-from functools import reduce
+from .meta import Specification, Meta, get_meta_attr
+from functools import reduce, update_wrapper
+from importlib import import_module
+from inspect import iscoroutinefunction
+from itertools import chain, islice
+
+if TYPE_CHECKING:
+    import numpy as np
 
 T = TypeVar("T")
 
 
+def _find_task(module: str, qualname: str) -> "Task":
+    obj = import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return getattr(obj, "_task", obj)  # workspace attributes are proxies
+
+
 class Task(ABC, Generic[T], Named):
     dependencies: Tuple[Union[str, "Task"], ...]
     specification: Optional[Specification] = None
@@ -16,24 +29,43 @@ class Task(ABC, Generic[T], Named):
     def check_by_meta(self, meta: Meta):
         pass
 
+    @property
+    def is_async(self) -> bool:
+        return iscoroutinefunction(self.transform)
+
     @abstractmethod
     def transform(self, meta: Meta, /, **kwargs: Any) -> T:
         pass
 
 
-class FunctionTask(Task[T]):
+class _FunctionWrapper:
+    """Calls, awaitability and pickling of a task made of a function."""
+    _func: Callable
+
+    def __call__(self, *args, **kwargs):
+        return self._func(*args, **kwargs)
+
+    @property
+    def is_async(self) -> bool:
+        return iscoroutinefunction(self._func)
+
+    def __reduce__(self):
+        # the wrapped function is shadowed by the task in its module, so the
+        # task itself is pickled by reference
+        return _find_task, (self.__module__, self.__qualname__)
+
+
+class FunctionTask(_FunctionWrapper, Task[T]):
     def __init__(self, name: str, func: Callable, dependencies: Tuple[Union[str, "Task"], ...],
                  specification: Optional[Specification] = None,
                  settings: Optional[Meta] = None):
         self._name = name
         self._func = func
+        update_wrapper(self, func)
         self.dependencies = dependencies
         self.specification = specification
         self.settings = settings
 
-    def __call__(self, *args, **kwargs):
-        return self._func(*args, **kwargs)
-
     def transform(self, meta: Meta, /, **kwargs: Any) -> T:
         return self._func(meta, **kwargs)
 
@@ -41,6 +73,10 @@ class FunctionTask(Task[T]):
 class DataTask(Task[T]):
     dependencies = ()
 
+    @property
+    def is_async(self) -> bool:
+        return iscoroutinefunction(self.data)
+
     @abstractmethod
     def data(self, meta: Meta) -> T:
         pass
@@ -49,45 +85,64 @@ class DataTask(Task[T]):
         return self.data(meta)
 
 
-class FunctionDataTask(DataTask[T]):
+class FunctionDataTask(_FunctionWrapper, DataTask[T]):
     def __init__(self, name: str, func: Callable,
                  specification: Optional[Specification] = None,
                  settings: Optional[Meta] = None):
         self._name = name
         self._func = func
+        update_wrapper(self, func)
         self.specification = specification
         self.settings = settings
 
-    def __call__(self, *args, **kwargs):
-        return self._func(*args, **kwargs)
-
     def data(self, meta: Meta) -> T:
         return self._func(meta)
 
 
-def data(func: Callable[[Meta], T], specification: Optional[Specification] = None, **settings) -> FunctionDataTask[T]:
-    def wrap(name):
-        return FunctionDataTask(name, func, specification, **settings)
+def data(func: Optional[Callable[[Meta], T]] = None, specification: Optional[Specification] = None,
+         **settings) -> FunctionDataTask[T]:
+    """Make a data task of the function; keyword arguments become its settings.
+
+    Used bare as ``@data`` or with arguments as ``@data(execution="io")``.
+    """
+    def wrap(func: Callable[[Meta], T]) -> FunctionDataTask[T]:
+        return FunctionDataTask(func.__name__, func, specification, settings or None)
 
     if func is None:
         return wrap
-    else:
-        return FunctionDataTask(func.__name__, func, specification, **settings)
+    return wrap(func)
+
 
+def task(func: Optional[Callable[..., T]] = None, specification: Optional[Specification] = None,
+         **settings) -> FunctionTask[T]:
+    """Make a task of the function, its parameters after ``meta`` name the dependencies.
 
+    Used bare as ``@task`` or with arguments as ``@task(execution="cpu")``.
+    """
+    def wrap(func: Callable[..., T]) -> FunctionTask[T]:
+        code = func.__code__
+        names = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+        dependencies = tuple(name for name in names if name != "meta")
+        return FunctionTask(func.__name__, func, dependencies, specification, settings or None)
 
-def task(func: Callable[[Meta, ...], T], specification: Optional[Specification] = None, **settings) -> FunctionTask[T]:
-    def wrap(name, dependencies):
-        return FunctionTask(name, func, dependencies, specification, **settings)
-    args=[]
-    for arg in func.__code__.co_varnames:
-        if arg != 'meta':
-            args.append(arg)
-    args=tuple(args)
     if func is None:
-        wrap
-    else:
-        return FunctionTask(func.__name__, func, args, specification, **settings)
+        return wrap
+    return wrap(func)
+
+
+IO = "io"
+CPU = "cpu"
+INLINE = "inline"
+HEAVY = "heavy"
+EXECUTION_CLASSES = IO, CPU, INLINE, HEAVY
+
+
+def execution_class(task: Task) -> str:
+    """Execution class declared by ``execution`` in the task settings, ``io`` by default."""
+    execution = get_meta_attr(task.settings or {}, "execution", IO)
+    if execution not in EXECUTION_CLASSES:
+        raise ValueError(f"unknown execution class {execution!r} of task {task.name}")
+    return execution
 
 
 class MapTask(Task[Iterator[T]]):
@@ -97,9 +152,11 @@ class MapTask(Task[Iterator[T]]):
             self.dependence = dependence
         else:
             self.dependence = dependence.name
-        self.name = 'map_' + self.dependence
+        self.dependencies = (dependence,)
+        self._name = 'map_' + self.dependence
+
     def transform(self, meta: Meta, /, **kwargs: Any):
-        return map(self.func, kwargs[self.dependence].items())
+        return map(self.func, kwargs[self.dependence])
 
 
 class FilterTask(Task[Iterator[T]]):
@@ -110,23 +167,146 @@ class FilterTask(Task[Iterator[T]]):
             self.dependence = dependence
         else:
             self.dependence = dependence.name
+        self.dependencies = (dependence,)
 
         self._name = 'filter_' + self.dependence
 
     def transform(self, meta: Meta, /, **kwargs: Any):
-        return filter(self.key, kwargs[self.dependence].items())
+        return filter(self.key, kwargs[self.dependence])
+
 
+class ReduceTask(Task[T]):
+    """Reduction of the dependence by a binary function.
 
-class ReduceTask(Task[Iterator[T]]):
-    def __init__(self, func: Callable, dependence: Union[str, "Task"]):
+    A reduction declared ``associative`` is computed as a parallel tree over
+    chunks on the pool of :func:`stem.parallel.get_pool` (see
+    :func:`stem.parallel.tree_reduce`); ``commutative`` lets partial results
+    be combined in completion order.
+    """
+
+    def __init__(self, func: Callable, dependence: Union[str, "Task"], associative: bool = False,
+                 commutative: bool = False, chunk_size: Optional[int] = None, max_in_flight: Optional[int] = None):
         self.func = func
+        self.associative = associative
+        self.commutative = commutative
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
         
         if isinstance(dependence, str):
             self.dependence = dependence
         else:
             self.dependence = dependence.name
+        self.dependencies = (dependence,)
 
         self._name = 'reduce_' + self.dependence
 
     def transform(self, meta: Meta, /, **kwargs: Any):
-        return reduce(self.func, kwargs[self.dependence].items())
\ No newline at end of file
+        if self.associative:
+            from .parallel import tree_reduce
+            return tree_reduce(self.func, kwargs[self.dependence], self.chunk_size, self.commutative,
+                               self.max_in_flight)
+        return reduce(self.func, kwargs[self.dependence])
+
+
+CHUNK_SIZE = 1 << 16
+
+
+def iter_chunks(values: Iterable, chunk_size: int = CHUNK_SIZE, dtype: Any = None) -> Iterator["np.ndarray"]:
+    """Values as NumPy arrays of at most ``chunk_size`` elements.
+
+    An array is sliced without copying, a stream of arrays is passed through
+    as it is, and a stream of scalars is batched.
+    """
+    import numpy as np
+    if isinstance(values, np.ndarray):
+        for start in range(0, len(values), chunk_size):
+            yield values[start:start + chunk_size]
+        return
+    iterator = iter(values)
+    for first in iterator:
+        if isinstance(first, np.ndarray):
+            yield first
+            yield from iterator
+            return
+        batch = chain((first,), islice(iterator, chunk_size - 1))
+        if dtype is not None:
+            yield np.fromiter(batch, dtype)
+        else:
+            yield np.asarray(list(batch))
+
+
+class ArrayMapTask(MapTask[T]):
+    """Map of a vectorized function over the dependence taken in NumPy chunks.
+
+    Yields the mapped chunks.
+    """
+
+    def __init__(self, func: Callable, dependence: Union[str, "Task"],
+                 chunk_size: int = CHUNK_SIZE, dtype: Any = None):
+        super().__init__(func, dependence)
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+
+    def transform(self, meta: Meta, /, **kwargs: Any):
+        return map(self.func, iter_chunks(kwargs[self.dependence], self.chunk_size, self.dtype))
+
+
+class ParallelMapTask(MapTask[T]):
+    """Map of the dependence computed in chunks on a process pool.
+
+    Results stay in input order and are produced lazily with at most
+    ``max_in_flight`` chunks ahead of the consumer; ``func`` must be picklable.
+    """
+
+    def __init__(self, func: Callable, dependence: Union[str, "Task"], chunk_size: Optional[int] = None,
+                 max_in_flight: Optional[int] = None):
+        super().__init__(func, dependence)
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+
+    def transform(self, meta: Meta, /, **kwargs: Any):
+        from .parallel import parallel_map
+        return parallel_map(self.func, kwargs[self.dependence], self.chunk_size, self.max_in_flight)
+
+
+class ArrayFilterTask(FilterTask[T]):
+    """Filter of the dependence taken in NumPy chunks by a boolean mask function.
+
+    Yields the non-empty filtered chunks.
+    """
+
+    def __init__(self, key: Callable, dependence: Union[str, "Task"],
+                 chunk_size: int = CHUNK_SIZE, dtype: Any = None):
+        super().__init__(key, dependence)
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+
+    def transform(self, meta: Meta, /, **kwargs: Any):
+        for chunk in iter_chunks(kwargs[self.dependence], self.chunk_size, self.dtype):
+            if len(chunk := chunk[self.key(chunk)]):
+                yield chunk
+
+
+class ArrayReduceTask(ReduceTask[T]):
+    """Reduction of the dependence taken in NumPy chunks.
+
+    ``func`` is either a binary ufunc such as ``np.add``, whose ``reduce``
+    folds a chunk, or a function of a chunk such as ``np.max``; the partial
+    results are folded with ``combine``, which defaults to the ufunc itself
+    or to ``func`` applied to the pair of partials.
+    """
+
+    def __init__(self, func: Callable, dependence: Union[str, "Task"], combine: Optional[Callable] = None,
+                 chunk_size: int = CHUNK_SIZE, dtype: Any = None):
+        super().__init__(func, dependence, chunk_size=chunk_size)
+        self.combine = combine
+        self.dtype = dtype
+
+    def transform(self, meta: Meta, /, **kwargs: Any):
+        import numpy as np
+        if isinstance(self.func, np.ufunc):
+            partial, combine = self.func.reduce, self.combine or self.func
+        else:
+            partial, combine = self.func, self.combine or (lambda x, y: self.func(np.array([x, y])))
+        partials = map(partial, iter_chunks(kwargs[self.dependence], self.chunk_size, self.dtype))
+        return reduce(combine, partials)
@@ -1,14 +1,21 @@
+from contextlib import nullcontext
 from enum import Enum, auto
-from typing import Optional, Callable, Type, TypeVar, Generic
+from typing import Optional, Callable, Type, TypeVar, Generic, Iterable, Iterator, TYPE_CHECKING
 from functools import cached_property
-from dataclasses import dataclass, field
+from copy import deepcopy
+from dataclasses import dataclass, field, fields
 
-from .meta import Meta, MetaVerification, Specification
+from .meta import Meta, MetaVerification, Specification, meta_fingerprint, diff_meta
 from .task import Task
 from .workspace import IWorkspace
-from .task_runner import TaskRunner, SimpleRunner
+from .cache import MISSING, MemoryCache, ResultCache, RunResults
+from .memory import MemoryUsage, reporting
 from .task_tree import TaskNode, TaskTree
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+    from .task_runner import TaskRunner
+
 T = TypeVar("T")
 
 
@@ -46,6 +53,11 @@ class TaskResult(Generic[T]):
     task_node: TaskNode[T]
     meta_errors: Optional[TaskMetaError] = None
     lazy_data: Callable[[], T] = lambda: None
+    meta: Optional[Meta] = None
+    results: Optional[RunResults] = None  # node results retained for reexecute
+    changed: Optional[set[str]] = None  # meta paths changed since the previous execution
+    error: Optional[Exception] = None  # first failure of the invocation
+    memory: Optional[dict[str, MemoryUsage]] = None  # usage by node name once evaluated, see measure_memory
 
     @cached_property
     def data(self) -> Optional[T]:
@@ -53,39 +65,181 @@ class TaskResult(Generic[T]):
             return self.lazy_data()
         except Exception as e:
             self.status = TaskStatus.INVOCATION_ERROR
+            self.error = e
             raise e
 
 
-class TaskMaster:
+@dataclass
+class TaskFuture(TaskResult[T]):
+    """Result of a task submitted for evaluation in the background."""
+    future: Optional["Future"] = None
 
-    def __init__(self, task_runner: TaskRunner[T] = SimpleRunner(), task_tree: Optional[TaskTree] = None):
-        self.task_runner = task_runner
-        self.task_tree = task_tree
+    def done(self) -> bool:
+        return self.future.done()
 
-    def execute(self, meta: Meta, task: Task[T], workspace: Optional[Type[IWorkspace]] = None) -> TaskResult[T]:
+    def result(self, timeout: Optional[float] = None) -> Optional[T]:
+        self.future.result(timeout)
+        return self.data
 
-        if self.task_tree is not None:
-            task_node = self.task_tree.resolve_node(task, workspace)
-        else:
-            task_node = TaskNode(task, workspace)
+    def add_done_callback(self, fn: Callable[["TaskFuture[T]"], None]):
+        self.future.add_done_callback(lambda _: fn(self))
 
-        if task.specification is not None:
-            verif = MetaVerification.verify(meta, task.specification)
+    def __await__(self):
+        import asyncio
+        yield from asyncio.wrap_future(self.future).__await__()
+        return self.data
+
+
+class TaskMaster:
+    BACKGROUND_WORKERS = 4
+
+    def __init__(self, task_runner: Optional["TaskRunner[T]"] = None, task_tree: Optional[TaskTree] = None,
+                 cache: Optional[ResultCache] = None, memory_cache: Optional[MemoryCache] = None,
+                 measure_memory: bool = False):
+        if task_runner is None:
+            from .task_runner import SimpleRunner
+            task_runner = SimpleRunner()
+        self.task_runner = task_runner
+        self.task_tree = task_tree if task_tree is not None else TaskTree()
+        self.cache = cache
+        self.memory_cache = memory_cache
+        self.measure_memory = measure_memory
+        self._background: Optional["Executor"] = None
+
+    def close(self):
+        if self._background is not None:
+            self._background.shutdown()
+            self._background = None
+        self.task_runner.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def execute(self, meta: Meta, task: Task[T], workspace: Optional[Type[IWorkspace]] = None,
+                retain: bool = False) -> TaskResult[T]:
+        results = RunResults(cache=self.cache) if retain else None
+        return self._execute(meta, task, workspace, results)
+
+    def submit(self, meta: Meta, task: Task[T], workspace: Optional[Type[IWorkspace]] = None,
+               retain: bool = False) -> TaskFuture[T]:
+        """Start the execution on a background thread right away.
+
+        The returned result completes when the data is evaluated; reading
+        ``data`` waits for it.
+        """
+        from concurrent.futures import Future, ThreadPoolExecutor
+        result = self.execute(meta, task, workspace, retain)
+        submitted = TaskFuture(**{f.name: getattr(result, f.name) for f in fields(result)}, future=Future())
+        if result.status != TaskStatus.CONTAINS_DATA:
+            submitted.future.set_result(None)
+            return submitted
+
+        if self._background is None:
+            self._background = ThreadPoolExecutor(self.BACKGROUND_WORKERS, thread_name_prefix="stem-submit")
+        submitted.future = self._background.submit(result.lazy_data)
+        submitted.lazy_data = submitted.future.result
+
+        def failed(future: "Future"):
+            if not future.cancelled() and (error := future.exception()) is not None:
+                submitted.status = TaskStatus.INVOCATION_ERROR
+                submitted.error = error
+
+        submitted.future.add_done_callback(failed)
+        return submitted
+
+    def execute_many(self, metas: Iterable[Meta], task: Task[T],
+                     workspace: Optional[Type[IWorkspace]] = None) -> Iterator[tuple[int, TaskResult[T]]]:
+        """Execute the task for every meta as one graph, yielding ``(index, result)`` as each finishes.
+
+        Nodes whose meta sub-trees are equal across the metas are evaluated
+        once. Results with meta or dependency errors come first; a failure
+        of the graph is raised from the iterator.
+        """
+        metas = list(metas)
+        task_node = self.task_tree.resolve_node(task, workspace)
+        valid = []
+        for i, meta in enumerate(metas):
+            if (error := self._check(meta, task_node)) is not None:
+                yield i, error
+            else:
+                valid.append(i)
+
+        values = self.task_runner.run_many([metas[i] for i in valid], task_node, self.cache)
+        for j, value in values:
+            i = valid[j]
+            yield i, TaskResult(TaskStatus.CONTAINS_DATA, task_node, lazy_data=lambda value=value: value, meta=metas[i])
+
+    def reexecute(self, previous: TaskResult[T], meta: Meta) -> TaskResult[T]:
+        """Execute the task of a retaining execution again with new meta.
+
+        Only nodes whose meta sub-tree changed and the nodes depending on them
+        run again, the others reuse the results retained by ``previous``.
+        """
+        if previous.results is None:
+            raise ValueError("previous execution did not retain its results, use execute(..., retain=True)")
+        changed = diff_meta(previous.meta, meta)
+        if not changed and previous.status == TaskStatus.CONTAINS_DATA:
+            return previous
+        task_node = previous.task_node
+        result = self._execute(meta, task_node.task, task_node.workspace, RunResults(previous.results, self.cache))
+        result.changed = changed
+        return result
+
+    @staticmethod
+    def _check(meta: Meta, task_node: TaskNode[T], results: Optional[RunResults] = None) -> Optional[TaskResult[T]]:
+        if task_node.task.specification is not None:
+            verif = MetaVerification.verify(meta, task_node.task.specification)
             if not verif.checked_success:
                 return TaskResult(
                     TaskStatus.META_ERROR,
                     task_node,
-                    TaskMetaError(task_node, verif)
+                    TaskMetaError(task_node, verif),
+                    meta = meta,
+                    results = results
                 )
 
         if task_node.has_dependence_errors:
             return TaskResult(
                 TaskStatus.DEPENDENCIES_ERROR,
-                task_node
+                task_node,
+                meta = meta,
+                results = results
             )
 
+    def _execute(self, meta: Meta, task: Task[T], workspace: Optional[Type[IWorkspace]],
+                 results: Optional[RunResults]) -> TaskResult[T]:
+        task_node = self.task_tree.resolve_node(task, workspace)
+        memory_key = None
+        if self.memory_cache is not None and results is None and (fingerprint := meta_fingerprint(meta)) is not None:
+            memory_key = task, workspace, fingerprint
+            if (value := self.memory_cache.get(memory_key)) is not MISSING:
+                return TaskResult(TaskStatus.CONTAINS_DATA, task_node, lazy_data=lambda: value, meta=meta)
+
+        if results is not None:
+            meta = deepcopy(meta)
+
+        if (error := self._check(meta, task_node, results)) is not None:
+            return error
+
+        memory = {} if self.measure_memory else None
+
+        def lazy_data():
+            with reporting(memory) if memory is not None else nullcontext():
+                value = self.task_runner.run(meta, task_node, self.cache if results is None else results)
+            if memory_key is not None:
+                value = self.memory_cache.put(memory_key, value)
+            return value
+
         return TaskResult(
             TaskStatus.CONTAINS_DATA,
             task_node,
-            lazy_data = lambda: self.task_runner.run(meta, task_node)
+            lazy_data = lazy_data,
+            meta = meta,
+            results = results,
+            memory = memory
         )
\ No newline at end of file
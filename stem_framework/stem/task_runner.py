@@ -1,149 +1,1088 @@
 import os
-from typing import Generic, TypeVar
+import time
+from typing import Generic, TypeVar, Optional, Any, Callable, Hashable, Iterator, Iterable, TYPE_CHECKING
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor, Future, InvalidStateError, wait, \
+    FIRST_COMPLETED
+from contextlib import nullcontext
+from contextvars import copy_context
+from functools import partial
+from heapq import heappush, heappop
+from inspect import isawaitable
+import queue
 import threading
-import time
-from collections import deque
-from threading import Thread
-import asyncio
-import multyprocessing 
-from multiprocessing import Process
-asyncio.set_event_loop(asyncio.new_event_loop())
-from .meta import Meta, get_meta_attr
+from itertools import tee, islice
+from .meta import Meta, get_meta_attr, freeze_meta
+from .task import Task, execution_class, IO, CPU, HEAVY, INLINE
 from .task_tree import TaskNode
+from . import shared
+from .cache import MISSING, ResultCache, result_key, approximate_size
+from .stats import StatsStore
+from .trace import Span, Tracer
+from .memory import MemoryMeter, MemoryLimitExceeded, memory_limit, is_reporting, report as report_memory
+from .cancel import Cancelled, CancellationToken, cancellation
+
+if TYPE_CHECKING:
+    import asyncio
 
 T = TypeVar("T")
+
+
+def _invoke(task: Task[T], meta: Meta, kwargs: dict[str, Any], token: Optional[CancellationToken] = None) -> T:
+    """Evaluate the task, clearing ``kwargs`` once it returns.
+
+    An executor keeps the call until its worker takes the next one, which
+    would keep the dependency results alive after their consumers finish.
+    """
+    if token is not None:
+        with cancellation(token):
+            return _invoke(task, meta, kwargs)
+    try:
+        result = task.transform(meta, **kwargs)
+    finally:
+        kwargs.clear()
+    if isawaitable(result):
+        import asyncio
+        result = asyncio.run(result)
+    return result
+
+
 class TaskRunner(ABC, Generic[T]):
+    """Evaluates the task graph of a node.
+
+    The first failure cancels the nodes not started yet and the cancellation
+    token of the execution (see :mod:`stem.cancel`), and is raised without
+    waiting for the running nodes. A node fails with ``TimeoutError`` when it
+    runs longer than ``timeout`` seconds from its settings. Runners given a
+    :class:`~stem.trace.Tracer` report every evaluated node to it.
+    """
+
     @abstractmethod
-    def run(self, meta: Meta, task_node: TaskNode[T]) -> T:
+    def run(self, meta: Meta, task_node: TaskNode[T], cache: Optional[ResultCache] = None) -> T:
+        pass
+
+    def run_many(self, metas: Iterable[Meta], task_node: TaskNode[T],
+                 cache: Optional[ResultCache] = None) -> Iterator[tuple[int, T]]:
+        """Evaluate the task node for every meta, yielding ``(index, value)`` pairs as they finish.
+
+        This implementation runs the metas one after another; runners that
+        evaluate them as one graph share the nodes with equal meta sub-trees.
+        """
+        for i, meta in enumerate(metas):
+            yield i, self.run(meta, task_node, cache)
+
+    def close(self):
         pass
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _Job:
+    """A task node bound to the meta it runs with inside one execution."""
+
+    def __init__(self, task_node: TaskNode, meta: Meta):
+        self.task_node = task_node
+        self.meta = meta
+        self.dependencies: list["_Job"] = []
+        self.dependents: list["_Job"] = []
+        self.key: Optional[str] = None
+        self.value: Any = MISSING
+        self.ready: Optional[float] = None  # time its dependencies were done
+        self.span: Optional[Span] = None  # started on submission to another process
+
+    @property
+    def cached(self) -> bool:
+        return self.value is not MISSING
+
+    @property
+    def name(self) -> str:
+        return self.task_node.task.name
+
+    @property
+    def task(self) -> Task:
+        return self.task_node.task
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return get_meta_attr(self.task.settings or {}, "timeout", None)
+
+    def timed_out(self) -> TimeoutError:
+        return TimeoutError(f"task {self.name} did not finish within {self.timeout} s")
+
+    @property
+    def memory_limit(self) -> Optional[int]:
+        return memory_limit(self.task)
+
+
+class _Metas:
+    """Distinct meta sub-trees a plan node is evaluated with.
+
+    Metas are told apart by identity first, as the sub-trees taken from one
+    meta are the same objects, and frozen only when a node meets several.
+    """
+
+    def __init__(self):
+        self.metas: list[Meta] = []
+        self._by_id: dict[int, int] = {}
+        self._by_frozen: Optional[dict[Hashable, int]] = None
+        self._kept: list[Meta] = []  # metas merged into another one, kept so their ids stay unique
+
+    def add(self, meta: Meta) -> int:
+        if (k := self._by_id.get(id(meta))) is not None:
+            return k
+        if self.metas:
+            if self._by_frozen is None:
+                self._by_frozen = {freeze_meta(m): k for k, m in enumerate(self.metas)}
+            frozen = freeze_meta(meta)
+            if (k := self._by_frozen.get(frozen)) is not None:
+                self._by_id[id(meta)] = k
+                self._kept.append(meta)
+                return k
+            self._by_frozen[frozen] = len(self.metas)
+        k = self._by_id[id(meta)] = len(self.metas)
+        self.metas.append(meta)
+        return k
+
+
+def _flatten_many(metas: Iterable[Meta], task_node: TaskNode,
+                  cache: Optional[ResultCache] = None) -> tuple[list[_Job], list[_Job]]:
+    """Jobs of one graph evaluating the task node for every meta, and the root job of every meta.
+
+    Every job is placed after its dependencies. Nodes of the same task reached
+    with equal meta sub-trees, within a meta or across them, are merged into
+    one job, which is then evaluated once and shared by all its dependents.
+    With a cache, jobs found in it hold their value and jobs needed only by
+    them are dropped. The graph goes
+    through the topological order of the compiled plan of the node: the
+    metas of every node are gathered from the root down, then the jobs are
+    made from the leaves up.
+    """
+    plan = task_node.plan
+    instances = [_Metas() for _ in plan.nodes]
+    links: list[list[list[tuple[int, int]]]] = [[] for _ in plan.nodes]  # dependency instances per instance
+    roots = [instances[0].add(meta) for meta in metas]
+    for i in reversed(plan.order):
+        for meta in instances[i].metas:
+            links[i].append([(d, instances[d].add(get_meta_attr(meta, plan.names[d], {})))
+                             for d in plan.dependencies[i]])
+
+    jobs: list[_Job] = []
+    made: list[list[_Job]] = [[] for _ in plan.nodes]
+    for i in plan.order:
+        for meta, dependencies in zip(instances[i].metas, links[i]):
+            job = _Job(plan.nodes[i], meta)
+            for d, k in dependencies:
+                dependence = made[d][k]
+                job.dependencies.append(dependence)
+                dependence.dependents.append(job)
+            if cache is not None:
+                job.key = result_key(job.task, meta, tuple(d.key for d in job.dependencies))
+                if job.key is not None:
+                    cache.touch(job.key)
+            made[i].append(job)
+            jobs.append(job)
+    root_jobs = [made[0][k] for k in roots]
+
+    if cache is not None:
+        jobs = _serve_cached(jobs, cache, set(root_jobs))
+    return jobs, root_jobs
+
+
+def _fan_out(indices: list[int], value: Any) -> Iterator[tuple[int, Any]]:
+    if isinstance(value, Iterator) and len(indices) > 1:
+        return zip(indices, _split(value, len(indices)))
+    return ((i, value) for i in indices)
+
+
+def _root_indices(roots: list[_Job]) -> dict[_Job, list[int]]:
+    indices: dict[_Job, list[int]] = {}
+    for i, root in enumerate(roots):
+        indices.setdefault(root, []).append(i)
+    return indices
+
+
+def _serve_cached(jobs: list[_Job], cache: ResultCache, roots: set[_Job]) -> list[_Job]:
+    needed = set(roots)
+    kept = []
+    for job in reversed(jobs):
+        if job not in needed:
+            continue
+        if job.key is not None:
+            job.value = cache.get(job.key)
+        if job.cached:
+            job.dependencies = []
+        else:
+            needed.update(job.dependencies)
+        kept.append(job)
+    for job in kept:
+        job.dependents = [d for d in job.dependents if d in needed and d.dependencies]
+    kept.reverse()
+    return kept
+
+
+def _store(cache: Optional[ResultCache], job: _Job, value: Any) -> Any:
+    if cache is not None and job.key is not None and not job.cached:
+        return cache.put(job.key, value)
+    return value
+
+
+def _size(value: Any) -> Optional[int]:
+    if isinstance(value, shared.SharedResult):
+        return value.size
+    if isinstance(value, Iterator):
+        return None
+    return approximate_size(value)
+
+
+def _record(stats: Optional[StatsStore], job: _Job, seconds: float, value: Any):
+    if stats is not None:
+        stats.record(job.task, job.meta, seconds, _size(value))
+
+
+class _Timed:
+    """Outcome of a call with the process, thread, times and memory of the worker that made it."""
+
+    def __init__(self, started: float, value: Any = None, error: Optional[BaseException] = None,
+                 meter: Optional[MemoryMeter] = None, span: Optional[Span] = None):
+        self.pid = os.getpid()
+        self.tid = threading.get_native_id()
+        self.started = started
+        self.finished = time.time()
+        self.value = value
+        self.error = error
+        self.memory = meter.usage if meter is not None else None
+        self.span = span
+        if error is not None and meter is not None and meter.token is not None and \
+                isinstance(meter.token.reason, MemoryLimitExceeded):
+            self.error = meter.token.reason
+
+
+def _start(tracer: Tracer, job: _Job, ready: float) -> Span:
+    """Open the span of the job and report it to the tracer."""
+    started = time.time()
+    span = Span(job.name, job.meta, ready, started, started, os.getpid(), threading.get_native_id())
+    tracer.start(span)
+    return span
+
+
+def _starter(tracer: Optional[Tracer], job: _Job, ready: float) -> Optional[Callable[[], Span]]:
+    """Start hook for a worker of this process, called when it begins the job."""
+    return partial(_start, tracer, job, ready) if tracer is not None else None
+
+
+def _timed(func, *args, meter: Optional[MemoryMeter] = None, start: Optional[Callable[[], Span]] = None) -> _Timed:
+    span = start() if start is not None else None
+    started = time.time()
+    if meter is None:
+        try:
+            return _Timed(started, func(*args), span=span)
+        except Exception as e:
+            return _Timed(started, error=e, span=span)
+
+    if meter.limit is not None and meter.token is None:
+        meter.token = CancellationToken()  # a process worker, the token of the execution does not reach it
+    try:
+        with meter, cancellation(meter.token) if meter.token is not None else nullcontext():
+            value = func(*args)
+    except Exception as e:
+        return _Timed(started, error=e, meter=meter, span=span)
+    return _Timed(started, value, meter=meter, span=span)
+
+
+async def _timed_async(awaitable, meter: Optional[MemoryMeter] = None,
+                       start: Optional[Callable[[], Span]] = None) -> _Timed:
+    span = start() if start is not None else None
+    started = time.time()
+    try:
+        with meter if meter is not None else nullcontext():
+            value = await awaitable
+    except Exception as e:
+        return _Timed(started, error=e, meter=meter, span=span)
+    return _Timed(started, value, meter=meter, span=span)
+
+
+def _meter(tracer: Optional[Tracer], job: _Job, token: Optional[CancellationToken]) -> Optional[MemoryMeter]:
+    """Meter of the job when its memory is limited, traced or reported."""
+    if job.memory_limit is None and not is_reporting() and not (tracer is not None and tracer.memory):
+        return None
+    return MemoryMeter(job.name, job.memory_limit, token)
+
+
+def _outcome(tracer: Optional[Tracer], job: _Job, timed: _Timed) -> Any:
+    """Finish the span of the timed call and report its memory, return its value or raise its error.
+
+    The span was started by the worker or, for another process, on
+    submission; it gets the times of the worker. A job whose peak memory
+    passed its limit fails with MemoryLimitExceeded.
+    """
+    error = timed.error
+    if timed.memory is not None:
+        report_memory(job.name, timed.memory)
+        if error is None and job.memory_limit is not None and timed.memory.peak > job.memory_limit:
+            error = MemoryMeter(job.name, job.memory_limit).exceeded(timed.memory.peak)
+            if isinstance(timed.value, shared.SharedResult):
+                timed.value.unlink()
+    if tracer is not None:
+        span = timed.span or job.span
+        span.started, span.finished, span.pid, span.tid = timed.started, timed.finished, timed.pid, timed.tid
+        span.memory = timed.memory
+        if error is not None:
+            span.error = error
+            tracer.error(span)
+        else:
+            span.size = _size(timed.value)
+            tracer.finish(span)
+    if error is not None:
+        raise error
+    return timed.value
+
+
+def _ranks(jobs: list[_Job], stats: Optional[StatsStore]) -> dict[_Job, float]:
+    """Upward rank of every job: its estimated cost plus the longest path to the root."""
+    ranks: dict[_Job, float] = {}
+    for job in reversed(jobs):
+        cost = 0.0 if job.cached else stats.estimate(job.task, job.meta) if stats is not None else 1.0
+        ranks[job] = cost + max((ranks[d] for d in job.dependents), default=0.0)
+    return ranks
+
+
+class _Copy(Iterator):
+    """One of the copies of an iterator, read under the lock shared by all of them.
+
+    A ``tee`` copy must not be advanced while another copy of the same
+    iterator is, which dependents running on several threads would do.
+    """
+
+    def __init__(self, copy: Iterator, lock: threading.Lock):
+        self._copy = copy
+        self._lock = lock
+
+    def __next__(self) -> Any:
+        with self._lock:
+            return next(self._copy)
+
+
+def _split(iterator: Iterator, n: int) -> list[_Copy]:
+    lock = threading.Lock()
+    return [_Copy(copy, lock) for copy in tee(iterator, n)]
+
+
+class _Copies(list):
+    pass
+
+
+class _Results(dict):
+    """Results of finished jobs.
+
+    An iterator consumed by several dependents is split into locked copies
+    so every dependent reads all of it, from any thread. A result is dropped once the last of
+    its dependents is done.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.waiting: dict[_Job, int] = {}
+
+    def set(self, job: _Job, value: Any):
+        if isinstance(value, Iterator) and len(job.dependents) > 1:
+            value = _Copies(_split(value, len(job.dependents)))
+        self[job] = value
+        self.waiting[job] = len(job.dependents)
+
+    def done(self, job: _Job) -> list[Any]:
+        """Drop the results only the finished job still needed, they are returned."""
+        dropped = []
+        for dependency in job.dependencies:
+            if dependency not in self.waiting:
+                continue
+            self.waiting[dependency] -= 1
+            if self.waiting[dependency] == 0:
+                del self.waiting[dependency]
+                if dependency in self:
+                    dropped.append(self.pop(dependency))
+        return dropped
+
+    def take(self, job: _Job) -> Any:
+        value = self[job]
+        if isinstance(value, _Copies):
+            return value.pop()
+        return value
+
+    def kwargs(self, job: _Job) -> dict[str, Any]:
+        return {d.name: self.take(d) for d in job.dependencies}
+
 
 class SimpleRunner(TaskRunner[T]):
-    def run(self, meta: Meta, task_node: TaskNode[T]) -> T:
+    def __init__(self, stats: Optional[StatsStore] = None, tracer: Optional[Tracer] = None):
+        self.stats = stats
+        self.tracer = tracer
+
+    def run(self, meta: Meta, task_node: TaskNode[T], cache: Optional[ResultCache] = None) -> T:
+        return dict(self.run_many([meta], task_node, cache))[0]
+
+    def run_many(self, metas: Iterable[Meta], task_node: TaskNode[T],
+                 cache: Optional[ResultCache] = None) -> Iterator[tuple[int, T]]:
         assert not task_node.has_dependence_errors
-        kwargs = {
-            t.task.name: self.run(
-                get_meta_attr(meta, t.task.name, {}),
-                t
-            )
-            for t in task_node.dependencies
-        }
-        return task_node.task.transform(meta, **kwargs)
+        jobs, roots = _flatten_many(metas, task_node, cache)
+        indices = _root_indices(roots)
+        results = _Results()
+        token = CancellationToken()
+        for job in jobs:
+            if job.cached:
+                value = job.value
+            else:
+                started = time.perf_counter()
+                if (meter := _meter(self.tracer, job, token)) is None and self.tracer is None:
+                    value = self._invoke(job, results.kwargs(job), token)
+                else:
+                    start = _starter(self.tracer, job, time.time())
+                    timed = _timed(self._invoke, job, results.kwargs(job), token, meter=meter, start=start)
+                    value = _outcome(self.tracer, job, timed)
+                _record(self.stats, job, time.perf_counter() - started, value)
+                value = _store(cache, job, value)
+                results.done(job)
+            if job in indices:
+                yield from _fan_out(indices[job], value)
+            else:
+                results.set(job, value)
+        if self.stats is not None:
+            self.stats.save()
 
+    @staticmethod
+    def _invoke(job: _Job, kwargs: dict[str, Any], token: CancellationToken) -> Any:
+        """Invoke the job, cancelling the token at its deadline.
 
-class ThreadingRunner(TaskRunner[T]):
-    MAX_WORKERS = 5
+        A task ignoring the token fails only after it returns.
+        """
+        if job.timeout is None:
+            return _invoke(job.task, job.meta, kwargs, token)
+        timer = threading.Timer(job.timeout, token.cancel, (job.timed_out(),))
+        timer.daemon = True
+        timer.start()
+        try:
+            value = _invoke(job.task, job.meta, kwargs, token)
+        except Cancelled:
+            if isinstance(token.reason, TimeoutError):
+                raise token.reason from None
+            raise
+        finally:
+            timer.cancel()
+        if token.cancelled:
+            raise token.reason
+        return value
 
-    activeThreadsTasks = deque()
-
-    threadsContent = dict()
-
-    def _task_in_thread(self, number, task_node, meta, **kwargs):
-        self.threadsContent[number] = task_node.task.transform(task_node, meta, **kwargs)
-
-    def _thread_running(self, task_node: TaskNode[T], meta: Meta, **kwargs):
-        thread_number = len(self.activeThreadsTasks)
-        thread = threading.Thread(target=task_node.task.transform, args=(task_node, meta, *kwargs))
-        self.activeThreadsTasks.append(thread)
-        self.threadsContent[thread_number] = None
-        thread.start()
-        thread.join()
-        ret = self.threadsContent[thread_number]
-        self.activeThreadsTasks.remove(thread)
-        self.threadsContent.pop(thread_number)
-        return ret
-
-    def _start_thread_run(self, task_node: TaskNode[T], meta: Meta, **kwargs) -> T:
-        result: T
-        if len(self.activeThreadsTasks) < self.MAX_WORKERS:
-            result = self._thread_running(task_node=task_node, meta=meta, **kwargs)
-        else:
-            while True:
-                if len(self.activeThreadsTasks) < self.MAX_WORKERS:
-                    result = self._thread_running(task_node=task_node, meta=meta, **kwargs)
-                    break
-                time.sleep(0.1)
 
-        assert result is not None
-        return result
+class ExecutorRunner(TaskRunner[T]):
+    """Runs the task graph on a reusable executor.
+
+    Independent branches run concurrently. At most ``max_workers`` jobs are
+    in flight, a job being submitted only when a worker is free for it (see
+    :meth:`_lane`); among the ready jobs the one on the longest remaining
+    path to the root goes first, with costs estimated from ``stats`` (every job
+    costs the same without them), so long chains start early.
+    """
+    MAX_WORKERS: Optional[int] = None
+
+    def __init__(self, max_workers: Optional[int] = None, stats: Optional[StatsStore] = None,
+                 tracer: Optional[Tracer] = None):
+        self.max_workers = max_workers or self.MAX_WORKERS or 1
+        self.stats = stats
+        self.tracer = tracer
+        self._executor: Optional[Executor] = None
+
+    @abstractmethod
+    def _create_executor(self) -> Executor:
+        pass
 
-    def run(self, meta: Meta, task_node: TaskNode[T]) -> T:
-        kwargs = {t.task.name: self.run(get_meta_attr(meta, t.task.name, {}), t) for t in task_node.dependencies}
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._create_executor()
+        return self._executor
 
-        result: T = None
-        if len(task_node.dependencies) == 0:
-            result = self._start_thread_run(task_node=task_node, meta=meta, **kwargs)
-        assert result is not None
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _call(self, executor: Executor, job: _Job, token: Optional[CancellationToken], func, *args) -> Future:
+        """Submit the call, timed and measured when traced or metered; ``token`` is None for other processes."""
+        if (meter := _meter(self.tracer, job, token)) is None and self.tracer is None:
+            return executor.submit(func, *args)
+        if token is None:  # the tracer stays here, the span starts on submission
+            if self.tracer is not None:
+                job.span = _start(self.tracer, job, job.ready)
+            return executor.submit(_timed, func, *args, meter=meter)
+        return executor.submit(_timed, func, *args, meter=meter, start=_starter(self.tracer, job, job.ready))
+
+    def _submit(self, job: _Job, kwargs: dict[str, Any], token: CancellationToken) -> Future:
+        return self._call(self.executor, job, token, _invoke, job.task, job.meta, kwargs, token)
+
+    def _lane(self, job: _Job) -> Optional[str]:
+        """Workers the job runs on, every lane has its own in-flight limit."""
+        return None
+
+    def _capacity(self, lane: Optional[str]) -> int:
+        return self.max_workers
+
+    def _store(self, cache: Optional[ResultCache], job: _Job, result: Any) -> Any:
+        return _store(cache, job, result)
+
+    def _finish(self, result: Any) -> T:
         return result
 
+    def _release(self, results: Iterable[Any]):
+        pass
+
+    def _abandon(self, future: Future):
+        """Release the result of a job that finishes after its run was given up."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        value = future.result()
+        self._release([value.value if isinstance(value, _Timed) else value])
+
+    def run(self, meta: Meta, task_node: TaskNode[T], cache: Optional[ResultCache] = None) -> T:
+        return dict(self.run_many([meta], task_node, cache))[0]
+
+    def run_many(self, metas: Iterable[Meta], task_node: TaskNode[T],
+                 cache: Optional[ResultCache] = None) -> Iterator[tuple[int, T]]:
+        assert not task_node.has_dependence_errors
+        jobs, roots = _flatten_many(metas, task_node, cache)
+        indices = _root_indices(roots)
+        waiting = {job: len(job.dependencies) for job in jobs}
+        ranks = _ranks(jobs, self.stats)
+        order = {job: i for i, job in enumerate(jobs)}
+        ready: dict[Optional[str], list[tuple[float, int, _Job]]] = {}  # by lane
+        busy: dict[Optional[str], int] = {}  # jobs in flight by lane
+        results = _Results()
+        running: dict[Future, _Job] = {}
+        started: dict[Future, float] = {}
+        lanes: dict[Future, Optional[str]] = {}
+        deadlines: dict[Future, float] = {}
+        token = CancellationToken()
+
+        def make_ready(job: _Job):
+            if job.cached:
+                future = Future()
+                future.set_result(job.value)
+                running[future] = job
+            else:
+                job.ready = time.time()
+                heappush(ready.setdefault(self._lane(job), []), (-ranks[job], order[job], job))
+
+        def submit_ready():
+            for lane, queue in ready.items():
+                while queue and busy.get(lane, 0) < self._capacity(lane):
+                    _, _, job = heappop(queue)
+                    future = self._submit(job, results.kwargs(job), token)
+                    running[future] = job
+                    started[future] = time.perf_counter()
+                    lanes[future] = lane
+                    busy[lane] = busy.get(lane, 0) + 1
+                    if job.timeout is not None:
+                        deadlines[future] = started[future] + job.timeout
+
+        try:
+            for job in jobs:
+                if not job.dependencies:
+                    make_ready(job)
+            submit_ready()
+
+            while running:
+                timeout = max(min(deadlines.values()) - time.perf_counter(), 0) if deadlines else None
+                done, _ = wait(running, timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    raise running[min(deadlines, key=deadlines.get)].timed_out()
+                for future in done:
+                    job = running.pop(future)
+                    deadlines.pop(future, None)
+                    value = future.result()
+                    if future in started:
+                        seconds = time.perf_counter() - started.pop(future)
+                        busy[lanes.pop(future)] -= 1
+                        if isinstance(value, _Timed):
+                            value = _outcome(self.tracer, job, value)
+                        _record(self.stats, job, seconds, value)
+                    results.set(job, self._store(cache, job, value))
+                    self._release(results.done(job))
+                    if job in indices:
+                        yield from _fan_out(indices[job], self._finish(results.pop(job)))
+                    for dependent in job.dependents:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0:
+                            make_ready(dependent)
+                submit_ready()
+
+            if self.stats is not None:
+                self.stats.save()
+        except BaseException as e:
+            token.cancel(e)
+            raise
+        finally:
+            token.cancel()
+            for future in running:
+                if not future.cancel():
+                    future.add_done_callback(self._abandon)
+            self._release(results.values())
+
+
+class ThreadingRunner(ExecutorRunner[T]):
+    MAX_WORKERS = 5
+
+    def _create_executor(self) -> Executor:
+        return ThreadPoolExecutor(self.max_workers, thread_name_prefix="stem")
+
+
+def _boxed(func: Callable[[], T]) -> list[T]:
+    return [func()]
+
+
+async def _unboxed(awaitable) -> Any:
+    """Value of a boxed executor call, taken out so the future kept by the executor does not hold it."""
+    return (await awaitable).pop()
+
 
 class AsyncRunner(TaskRunner[T]):
-    loop = asyncio.get_event_loop()
+    """Awaits the task graph on an event loop owned by the runner.
 
-    def run(self, meta: Meta, task_node: TaskNode[T]) -> T:
-        result = self.loop.run_until_complete(self._make_tasks(meta, task_node))
-        self.loop.close()
-        return result
+    Coroutine tasks of independent branches overlap on the loop thread,
+    synchronous tasks run on the loop's thread executor.
+    """
+    MAX_WORKERS = 5
 
-    async def _make_tasks(self, meta: Meta, task_node: TaskNode[T]) -> list[T]:
-        await asyncio.sleep(0)
-        kwargs = {t.task.name: self.loop.create_task(self._make_tasks(get_meta_attr(meta, t.task.name, {}), t)) for t in task_node.dependencies}
+    def __init__(self, max_workers: Optional[int] = None, tracer: Optional[Tracer] = None):
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.tracer = tracer
+        self._loop: Optional["asyncio.AbstractEventLoop"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
 
-        for t in task_node.dependencies:
-            await kwargs[t.task.name]
+    @property
+    def loop(self) -> "asyncio.AbstractEventLoop":
+        """Event loop running on a thread of the runner, so several threads may run graphs at once."""
+        import asyncio  # loaded by the first async run only
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(ThreadPoolExecutor(self.max_workers, thread_name_prefix="stem"))
+                self._thread = threading.Thread(target=loop.run_forever, name="stem-loop", daemon=True)
+                self._thread.start()
+                self._loop = loop
+            return self._loop
 
-        result: T = None
-        if len(task_node.dependencies) == 0:
-            result = await self._async_transform(task_node, meta)
-        assert result is not None
-        return result
+    def close(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            import asyncio
+            asyncio.run_coroutine_threadsafe(self._loop.shutdown_default_executor(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = None
 
-    async def _async_transform(self, task_node: TaskNode[T], meta: Meta, **kwargs) -> T:
-        return task_node.task.transform(meta, **kwargs)
+    def run(self, meta: Meta, task_node: TaskNode[T], cache: Optional[ResultCache] = None) -> T:
+        loop = self.loop
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(self.run_async(meta, task_node, cache), loop).result()
 
+    def run_many(self, metas: Iterable[Meta], task_node: TaskNode[T],
+                 cache: Optional[ResultCache] = None) -> Iterator[tuple[int, T]]:
+        loop = self.loop
+        import asyncio
+        finished: queue.Queue = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._run_graph(list(metas), task_node, cache, finished.put), loop)
+        future.add_done_callback(lambda _: finished.put(_END))
+        try:
+            while (item := finished.get()) is not _END:
+                yield from _fan_out(*item)
+            future.result()
+        finally:
+            future.cancel()
 
-class ProcessingRunner(TaskRunner[T]):
-    MAX_WORKERS = os.cpu_count()
+    async def run_async(self, meta: Meta, task_node: TaskNode[T], cache: Optional[ResultCache] = None) -> T:
+        finished = []
+        await self._run_graph([meta], task_node, cache, finished.append)
+        (_, value), = finished
+        return value
+
+    async def _run_graph(self, metas: list[Meta], task_node: TaskNode[T], cache: Optional[ResultCache],
+                         finish: Callable[[tuple[list[int], Any]], None]):
+        """Run the graph of all the metas, giving ``finish`` the meta indices and value of every root when done."""
+        import asyncio
+        assert not task_node.has_dependence_errors
+        jobs, roots = _flatten_many(metas, task_node, cache)
+        indices = _root_indices(roots)
+        results = _Results()
+        tasks: dict[_Job, asyncio.Task] = {}
+        token = CancellationToken()
+        with cancellation(token):  # copied into the context of every job
+            for job in jobs:
+                dependencies = [tasks[d] for d in job.dependencies]
+                tasks[job] = asyncio.ensure_future(self._run_job(job, dependencies, results, cache, token))
+        try:
+            for done in asyncio.as_completed([tasks[root] for root in indices]):
+                root = await done
+                finish((indices[root], results.pop(root)))
+        except BaseException as e:
+            token.cancel(e)
+            raise
+        finally:
+            token.cancel()
+            for t in tasks.values():
+                t.cancel()
 
-    activeProcessTasks = deque()
-
-    processContent = dict()
-
-    def _task_in_process(self, number, task_node, meta, **kwargs):
-        self.processContent[number] = task_node.task.transform(task_node, meta, **kwargs)
-
-    def _process_running(self, task_node: TaskNode[T], meta: Meta, **kwargs):
-        process_number = len(self.activeProcessTasks)
-        process = Process(target=task_node.task.transform, args=(task_node, meta, *kwargs))
-        self.activeProcessTasks.append(process)
-        self.processContent[process_number] = None
-        process.start()
-        process.join()
-        ret = self.processContent[process_number]
-        self.activeProcessTasks.remove(process)
-        self.processContent.pop(process_number)
-        return ret
-
-    def _start_process_run(self, task_node: TaskNode[T], meta: Meta, **kwargs) -> T:
-        result: T
-        if len(self.activeProcessTasks) < self.MAX_WORKERS:
-            result = self._process_running(task_node=task_node, meta=meta, **kwargs)
+    async def _run_job(self, job: _Job, dependencies: list["asyncio.Task"], results: _Results,
+                       cache: Optional[ResultCache], token: CancellationToken) -> _Job:
+        import asyncio
+        await asyncio.gather(*dependencies)
+        if job.cached:
+            results.set(job, job.value)
+            return job
+        start = _starter(self.tracer, job, time.time())
+        kwargs = results.kwargs(job)
+        timed = (meter := _meter(self.tracer, job, token)) is not None or self.tracer is not None
+        if job.task.is_async:
+            awaitable = job.task.transform(job.meta, **kwargs)
+            if timed:
+                awaitable = _timed_async(awaitable, meter, start)
         else:
-            while True:
-                if len(self.activeProcessTasks) < self.MAX_WORKERS:
-                    result = self._process_running(task_node=task_node, meta=meta, **kwargs)
-                    break
-                time.sleep(0.1)
+            func = partial(_invoke, job.task, job.meta, kwargs, token)
+            if timed:
+                func = partial(_timed, func, meter=meter, start=start)
+            awaitable = _unboxed(asyncio.get_running_loop().run_in_executor(None, _boxed, func))
+        try:
+            value = await asyncio.wait_for(awaitable, job.timeout)
+        except asyncio.TimeoutError:
+            raise job.timed_out() from None
+        if timed:
+            value = _outcome(self.tracer, job, value)
+        results.set(job, _store(cache, job, value))
+        results.done(job)
+        return job
 
-        assert result is not None
-        return result
 
-    def run(self, meta: Meta, task_node: TaskNode[T]) -> T:
-        kwargs = {t.task.name: self.run(get_meta_attr(meta, t.task.name, {}), t) for t in task_node.dependencies}
+class _Stopped(Exception):
+    pass
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_END = object()
+
+
+class _Pipe:
+    """Bounded queue of chunks from a producing job to one consumer."""
+
+    def __init__(self, size: int, stop: CancellationToken):
+        self._queue: queue.Queue = queue.Queue(size)
+        self._stop = stop
+
+    def put(self, item: Any):
+        while True:
+            try:
+                return self._queue.put(item, timeout=0.1)
+            except queue.Full:
+                if self._stop.cancelled:
+                    raise _Stopped
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            try:
+                chunk = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.cancelled:
+                    raise _Stopped
+                continue
+            if chunk is _END:
+                return
+            if isinstance(chunk, _Failure):
+                raise chunk.error
+            yield from chunk
+
+
+class _Stream:
+    def __init__(self, pipes: list[_Pipe]):
+        self.pipes = pipes
+
+
+def _drain(pipe: _Pipe, release: Callable[[], None]) -> Iterator[Any]:
+    try:
+        yield from pipe
+    finally:
+        release()
+
+
+def _settle(future: Future, value: Any = None, error: Optional[BaseException] = None):
+    """Complete the future unless a timeout has already failed it."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+    except InvalidStateError:
+        pass
+
+
+class StreamingRunner(TaskRunner[T]):
+    """Runs iterator chains as a pipeline.
+
+    Every node runs on its own thread. An iterator result is pumped by that
+    thread in chunks into bounded queues, one per dependent, and dependents
+    read it while it is produced, so producer I/O overlaps consumer compute
+    and each edge holds at most ``queue_size * chunk_size`` items. A task
+    must not read one stream to the end before starting on another stream
+    of the same producer. Iterator results are not cached.
+    """
+    QUEUE_SIZE = 8
+    CHUNK_SIZE = 256
+
+    def __init__(self, queue_size: Optional[int] = None, chunk_size: Optional[int] = None,
+                 tracer: Optional[Tracer] = None):
+        self.queue_size = queue_size or self.QUEUE_SIZE
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.tracer = tracer
+
+    def run(self, meta: Meta, task_node: TaskNode[T], cache: Optional[ResultCache] = None) -> T:
+        return dict(self.run_many([meta], task_node, cache))[0]
+
+    def run_many(self, metas: Iterable[Meta], task_node: TaskNode[T],
+                 cache: Optional[ResultCache] = None) -> Iterator[tuple[int, T]]:
+        """Run the graph of all the metas at once; a root stream is read while it is produced.
+
+        Producers of streams nobody reads to the end are stopped once every
+        root is done and every root stream is read or closed.
+        """
+        assert not task_node.has_dependence_errors
+        jobs, roots = _flatten_many(metas, task_node, cache)
+        indices = _root_indices(roots)
+        stop = CancellationToken()
+        outputs: dict[_Job, Future] = {job: Future() for job in jobs}
+        for job in jobs:
+            threading.Thread(
+                target=copy_context().run, args=(self._run_job, job, outputs, cache, stop),
+                name=f"stem-{job.name}", daemon=True
+            ).start()
+
+        lock = threading.Lock()
+        unread = [len(indices)]  # roots not done or whose stream is still read
+
+        def release():
+            with lock:
+                unread[0] -= 1
+                if unread[0] == 0:
+                    stop.cancel()
+
+        pending = {future: job for job, future in outputs.items()}
+        try:
+            while any(job in indices for job in pending.values()):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    if future.exception() is not None:
+                        raise future.exception()
+                    if job not in indices:
+                        continue
+                    value = future.result()
+                    if isinstance(value, _Stream):
+                        yield from _fan_out(indices[job], _drain(value.pipes[0], release))
+                    else:
+                        release()
+                        yield from _fan_out(indices[job], value)
+        except BaseException as e:
+            stop.cancel(e)
+            raise
+
+    def _run_job(self, job: _Job, outputs: dict[_Job, Future], cache: Optional[ResultCache],
+                 stop: CancellationToken):
+        timer = None
+        if job.timeout is not None and not job.cached:
+            timer = threading.Timer(job.timeout, lambda: _settle(outputs[job], error=job.timed_out()))
+            timer.daemon = True
+            timer.start()
+        try:
+            if job.cached:
+                value = job.value
+            else:
+                kwargs = {d.name: self._take(outputs[d].result()) for d in job.dependencies}
+                if (meter := _meter(self.tracer, job, stop)) is None and self.tracer is None:
+                    value = _invoke(job.task, job.meta, kwargs, stop)
+                else:
+                    start = _starter(self.tracer, job, time.time())
+                    timed = _timed(_invoke, job.task, job.meta, kwargs, stop, meter=meter, start=start)
+                    value = _outcome(self.tracer, job, timed)
+                if not isinstance(value, Iterator):
+                    value = _store(cache, job, value)
+        except BaseException as e:
+            _settle(outputs[job], error=e)
+            return
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        if not isinstance(value, Iterator):
+            _settle(outputs[job], value)
+            return
+        pipes = [_Pipe(self.queue_size, stop) for _ in range(max(len(job.dependents), 1))]
+        _settle(outputs[job], _Stream(list(pipes)))
+        self._pump(value, pipes)
+
+    @staticmethod
+    def _take(value: Any) -> Any:
+        return value.pipes.pop() if isinstance(value, _Stream) else value
+
+    def _pump(self, iterator: Iterator[Any], pipes: list[_Pipe]):
+        try:
+            try:
+                while chunk := list(islice(iterator, self.chunk_size)):
+                    for pipe in pipes:
+                        pipe.put(chunk)
+                end = _END
+            except _Stopped:
+                raise
+            except BaseException as e:
+                end = _Failure(e)
+            for pipe in pipes:
+                pipe.put(end)
+        except _Stopped:
+            pass
+
+
+def _load_kwargs(kwargs: dict[str, Any]) -> dict[str, Any]:
+    return {name: shared.load(value) for name, value in kwargs.items()}
+
+
+def _materialized(kwargs: dict[str, Any]) -> dict[str, Any]:
+    """Arguments with iterators turned into lists, as iterators cannot be sent to worker processes."""
+    return {name: list(value) if isinstance(value, Iterator) else value for name, value in kwargs.items()}
+
+
+def _process_transform(task: Task, meta: Meta, kwargs: dict[str, Any]) -> Any:
+    result = _invoke(task, meta, _load_kwargs(kwargs))
+    if isinstance(result, Iterator):
+        result = list(result)  # generators cannot leave the worker
+    return shared.share(result)
+
+
+class ProcessingRunner(ExecutorRunner[T]):
+    """Runs every task node on a pool of worker processes kept for the runner lifetime.
+
+    Tasks are sent to workers by reference, iterators are materialized into
+    lists, and large arrays and bytes come back through shared memory.
+    """
+    MAX_WORKERS = os.cpu_count()
+
+    def _create_executor(self) -> Executor:
+        from concurrent.futures import ProcessPoolExecutor  # loads multiprocessing
+        shared.ensure_tracker()
+        return ProcessPoolExecutor(self.max_workers)
+
+    def _submit(self, job: _Job, kwargs: dict[str, Any], token: CancellationToken) -> Future:
+        # the token does not reach worker processes, their jobs are only cancelled before start
+        return self._call(self.executor, job, None, _process_transform, job.task, job.meta, _materialized(kwargs))
+
+    def _store(self, cache: Optional[ResultCache], job: _Job, result: Any) -> Any:
+        if isinstance(result, shared.SharedResult):
+            _store(cache, job, result.load())
+            return result
+        return _store(cache, job, result)
+
+    def _finish(self, result: Any) -> T:
+        try:
+            return shared.load(result)
+        finally:
+            self._release([result])
+
+    def _release(self, results: Iterable[Any]):
+        for result in results:
+            if isinstance(result, shared.SharedResult):
+                result.unlink()
+
+
+class _InlineExecutor(Executor):
+    """Runs every call on the submitting thread."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+_INLINE_EXECUTOR = _InlineExecutor()
+
+
+class HybridRunner(ProcessingRunner[T]):
+    """Routes every job by the execution class in its task settings.
+
+    ``io`` tasks (the default) run on a thread pool, ``cpu`` tasks on a
+    process pool, ``heavy`` tasks on a separate process pool so that long
+    jobs do not hold the ``cpu`` workers, and ``inline`` tasks run on the
+    scheduling thread. Iterators going to a process are materialized.
+    Every class has its own in-flight limit, its number of workers (one for
+    ``inline``), so jobs wait in the runner, ordered by priority, rather
+    than in the queue of a pool. The :mod:`stem.parallel` helpers called by
+    ``io`` and ``inline`` tasks run on the ``cpu`` pool, so their iterators
+    must be read before the runner is closed.
+    """
+    IO_WORKERS = 5
+    CPU_WORKERS = os.cpu_count()
+    HEAVY_WORKERS = 1
+
+    def __init__(self, io_workers: Optional[int] = None, cpu_workers: Optional[int] = None,
+                 heavy_workers: Optional[int] = None, stats: Optional[StatsStore] = None,
+                 tracer: Optional[Tracer] = None):
+        self.io_workers = io_workers or self.IO_WORKERS
+        self.cpu_workers = cpu_workers or self.CPU_WORKERS
+        self.heavy_workers = heavy_workers or self.HEAVY_WORKERS
+        super().__init__(self.io_workers + self.cpu_workers + self.heavy_workers, stats, tracer)
+        self._pools: dict[str, Executor] = {}
+        self._pools_lock = threading.Lock()
+
+    def _create_executor(self) -> Executor:
+        return ThreadPoolExecutor(self.io_workers, thread_name_prefix="stem")
+
+    def _pool(self, execution: str) -> Executor:
+        with self._pools_lock:  # parallel helpers ask for the cpu pool from the io threads
+            if (pool := self._pools.get(execution)) is None:
+                from concurrent.futures import ProcessPoolExecutor
+                shared.ensure_tracker()
+                pool = self._pools[execution] = ProcessPoolExecutor(
+                    self.cpu_workers if execution == CPU else self.heavy_workers
+                )
+            return pool
+
+    def _invoke_sharing(self, task: Task[T], meta: Meta, kwargs: dict[str, Any], token: CancellationToken) -> T:
+        from .parallel import pool_provider
+        with pool_provider(partial(self._pool, CPU)):
+            return _invoke(task, meta, kwargs, token)
+
+    def close(self):
+        super().close()
+        for pool in self._pools.values():
+            pool.shutdown()
+        self._pools.clear()
+
+    def _lane(self, job: _Job) -> Optional[str]:
+        return execution_class(job.task)
+
+    def _capacity(self, lane: Optional[str]) -> int:
+        return {IO: self.io_workers, CPU: self.cpu_workers, HEAVY: self.heavy_workers}.get(lane, 1)
 
-        result: T = None
-        if len(task_node.dependencies) == 0:
-            result = self._start_process_run(task_node=task_node, meta=meta, **kwargs)
-        assert result is not None
-        return result
\ No newline at end of file
+    def _submit(self, job: _Job, kwargs: dict[str, Any], token: CancellationToken) -> Future:
+        execution = execution_class(job.task)
+        if execution in (INLINE, IO):
+            executor = _INLINE_EXECUTOR if execution == INLINE else self.executor
+            return self._call(executor, job, token, self._invoke_sharing, job.task, job.meta, _load_kwargs(kwargs),
+                              token)
+        return self._call(self._pool(execution), job, None, _process_transform, job.task, job.meta,
+                          _materialized(kwargs))
@@ -1,3 +1,4 @@
+from functools import cached_property
 from typing import Type, TypeVar, Optional, Generic
 
 from .task import Task
@@ -20,33 +21,44 @@ class TaskNode(Generic[T]):
     def has_dependence_errors(self) -> bool:
         return self._has_dependence_errors
     
-    def __init__(self, task: Task, workspace: Type[IWorkspace] | None = None):
+    def __init__(self, task: Task, workspace: Type[IWorkspace] | None = None,
+                 nodes: Optional[dict[tuple[Task, Optional[Type[IWorkspace]]], "TaskNode"]] = None):
+        """Node of the task with its dependency nodes.
+
+        A dependency reached by several paths gets one node, so the nodes
+        form a DAG. ``nodes`` interns them by task and workspace and may be
+        shared between builds.
+        """
         if workspace is not None:
             workspace_ = workspace
         else:
             workspace_ = IWorkspace.find_default_workspace(task)
 
-
         self.task = task
         self._dependencies = []
         self._unresolved_dependencies = []
         self.workspace = workspace
+        nodes = {} if nodes is None else nodes
+        nodes[task, workspace] = self
 
         for d in task.dependencies: # d: Task | str
-            if isinstance(d, Task):
-                self._dependencies.append(TaskNode(d, workspace))
-            elif (t := workspace_.find_task(d)) is not None:
-                self._dependencies.append(TaskNode(t, workspace))
-            else:
+            t = d if isinstance(d, Task) else workspace_.find_task(d)
+            if t is None:
                 self._unresolved_dependencies.append(d)
+            elif (node := nodes.get((t, workspace))) is not None:
+                self._dependencies.append(node)
+            else:
+                self._dependencies.append(TaskNode(t, workspace, nodes))
 
         self._has_dependence_errors = self._unresolved_dependencies != [] or any(d._has_dependence_errors for d in self.dependencies)
 
+    @cached_property
+    def plan(self) -> "ExecutionPlan":
+        return ExecutionPlan(self)
+
     def find_node(self, task: Task[T]) -> Optional["TaskNode[T]"]:
-        if self.task == task:
-            return self
-        for d in self.dependencies:
-            if (node := d.resolve_node(task)) is not None:
+        for node in self.plan.nodes:
+            if node.task == task:
                 return node
 
     def resolve_node(self, task: Task[T], workspace: Type[IWorkspace] | None = None) -> "TaskNode[T]":
@@ -56,7 +68,78 @@ class TaskNode(Generic[T]):
         return TaskNode(task, workspace)
 
 
+class ExecutionPlan:
+    """Distinct nodes of the DAG of a node, the root first, compiled once per node.
+
+    Node ``i`` is ``nodes[i]``, its dependency nodes have the indices
+    ``dependencies[i]`` and it reads the meta sub-tree ``names[i]`` of the
+    meta of every node depending on it. ``order`` is a topological order of
+    the indices, every node after its dependencies and the root last.
+    """
+
+    def __init__(self, task_node: TaskNode):
+        self.nodes: list[TaskNode] = [task_node]
+        self.names: list[str] = []
+        self.dependencies: list[tuple[int, ...]] = []
+        indices = {id(task_node): 0}
+        for node in self.nodes:  # grows while iterated
+            self.names.append(node.task.name)
+            dependencies = []
+            for d in node.dependencies:
+                if (index := indices.get(id(d))) is None:
+                    index = indices[id(d)] = len(self.nodes)
+                    self.nodes.append(d)
+                dependencies.append(index)
+            self.dependencies.append(tuple(dependencies))
+        self.order: list[int] = self._topological_order()
+
+    def _topological_order(self) -> list[int]:
+        order: list[int] = []
+        visited = [False] * len(self.nodes)
+        stack = [(0, False)]
+        while stack:
+            i, expanded = stack.pop()
+            if expanded:
+                order.append(i)
+            elif not visited[i]:
+                visited[i] = True
+                stack.append((i, True))
+                stack.extend((d, False) for d in reversed(self.dependencies[i]) if not visited[d])
+        return order
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
 class TaskTree(TaskNode): # code reuse
+    """Interns the task nodes of all resolved tasks per task and workspace.
+
+    Nodes, and so their plans, are built once and looked up in constant
+    time. A tree built with a task also holds the nodes of its DAG.
+    """
+
+    def __init__(self, task: Optional[Task] = None, workspace: Type[IWorkspace] | None = None):
+        self._nodes: dict[tuple[Task, Optional[Type[IWorkspace]]], TaskNode] = {}
+        if task is not None:
+            super().__init__(task, workspace, self._nodes)
+        else:
+            self.task = None
+            self.workspace = workspace
+            self._dependencies = []
+            self._unresolved_dependencies = []
+            self._has_dependence_errors = False
+
+    def find_node(self, task: Task[T], workspace: Type[IWorkspace] | None = None) -> Optional["TaskNode[T]"]:
+        return self._nodes.get((task, workspace))
+
+    def resolve_node(self, task: Task[T], workspace: Type[IWorkspace] | None = None) -> "TaskNode[T]":
+        if (node := self._nodes.get((task, workspace))) is None:
+            node = TaskNode(task, workspace, self._nodes)
+        return node
+
+    def clear(self):
+        """Forget the resolved nodes, e.g. after the tasks of a workspace changed."""
+        self._nodes.clear()
 
     @staticmethod
     def build_node(task: Task):
@@ -0,0 +1,153 @@
+"""Tracing of task graph runs.
+
+A runner given a :class:`Tracer` reports every node it evaluates as a
+:class:`Span`. :class:`TraceRecorder` keeps the spans and writes them as
+Chrome Trace Event JSON, to be opened in chrome://tracing or Perfetto, or
+as a summary table per task.
+"""
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional, TextIO
+
+from .memory import MemoryUsage
+from .meta import Meta
+
+
+@dataclass
+class Span:
+    """One evaluation of a task node.
+
+    Times are ``time.time()`` seconds; ``pid`` and ``tid`` are those of the
+    worker that ran the node. Until the node is done ``finished`` equals
+    ``started``. The span of a node returning an iterator ends when the
+    iterator is returned, not when it is consumed.
+    """
+    name: str
+    meta: Meta
+    ready: float  # dependencies done
+    started: float
+    finished: float
+    pid: int
+    tid: int
+    size: Optional[int] = None
+    error: Optional[BaseException] = None
+    memory: Optional[MemoryUsage] = None  # when measured, see stem.memory
+
+    @property
+    def queue_wait(self) -> float:
+        return max(self.started - self.ready, 0.0)
+
+    @property
+    def run_time(self) -> float:
+        return self.finished - self.started
+
+
+class Tracer:
+    """Hooks of a runner.
+
+    ``start`` is called when a node begins, on the thread running it or, for
+    a node sent to another process, when it is submitted; the span then gets
+    the times of the worker. ``finish`` or ``error`` follows when the node is
+    done. Runners evaluating several nodes at once may call the hooks from
+    several threads. A tracer with ``memory`` set gets the memory usage of
+    every node.
+    """
+    memory = False
+
+    def start(self, span: Span):
+        pass
+
+    def finish(self, span: Span):
+        pass
+
+    def error(self, span: Span):
+        pass
+
+
+class TraceRecorder(Tracer):
+    """Keeps the spans of every node, one recorder may trace several runs."""
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self._lock = threading.Lock()
+        self.spans: list[Span] = []
+
+    def finish(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    error = finish
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """Trace Event Format: one complete event per span, microseconds from the first ready node."""
+        spans = list(self.spans)
+        origin = min((span.ready for span in spans), default=0.0)
+        events = []
+        for span in spans:
+            args: dict[str, Any] = {"queue_wait_ms": span.queue_wait * 1e3, "size": span.size}
+            if span.error is not None:
+                args["error"] = repr(span.error)
+            if span.memory is not None:
+                args["peak_memory"], args["retained_memory"] = span.memory.peak, span.memory.retained
+            events.append({
+                "name": span.name,
+                "cat": "error" if span.error is not None else "task",
+                "ph": "X",
+                "ts": (span.started - origin) * 1e6,
+                "dur": span.run_time * 1e6,
+                "pid": span.pid,
+                "tid": span.tid,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, file: TextIO):
+        json.dump(self.chrome_trace(), file)
+
+    def parallelism(self) -> float:
+        """Run time of all nodes over the wall time from the first start to the last finish.
+
+        About 1 when nothing overlapped, up to the number of workers.
+        """
+        spans = list(self.spans)
+        if not spans:
+            return 0.0
+        wall = max(span.finished for span in spans) - min(span.started for span in spans)
+        busy = sum(span.run_time for span in spans)
+        return busy / wall if wall > 0 else 1.0
+
+    def summary(self) -> list[dict[str, Any]]:
+        """Totals per task name, the task with the most run time first."""
+        rows: dict[str, dict[str, Any]] = {}
+        for span in list(self.spans):
+            row = rows.setdefault(span.name, {
+                "name": span.name, "count": 0, "errors": 0, "run_time": 0.0,
+                "max_run_time": 0.0, "queue_wait": 0.0, "size": 0, "peak_memory": None,
+            })
+            row["count"] += 1
+            row["errors"] += span.error is not None
+            row["run_time"] += span.run_time
+            row["max_run_time"] = max(row["max_run_time"], span.run_time)
+            row["queue_wait"] += span.queue_wait
+            row["size"] += span.size or 0
+            if span.memory is not None:
+                row["peak_memory"] = max(row["peak_memory"] or 0, span.memory.peak)
+        return sorted(rows.values(), key=lambda row: row["run_time"], reverse=True)
+
+    def format_summary(self) -> str:
+        lines = [f"{'task':<24} {'count':>6} {'errors':>6} {'total ms':>10} {'mean ms':>10} "
+                 f"{'max ms':>10} {'wait ms':>10} {'size':>12} {'peak memory':>12}"]
+        for row in self.summary():
+            lines.append(
+                f"{row['name']:<24} {row['count']:>6} {row['errors']:>6} {row['run_time'] * 1e3:>10.2f} "
+                f"{row['run_time'] / row['count'] * 1e3:>10.2f} {row['max_run_time'] * 1e3:>10.2f} "
+                f"{row['queue_wait'] * 1e3:>10.2f} {row['size']:>12} "
+                f"{'-' if row['peak_memory'] is None else row['peak_memory']:>12}"
+            )
+        lines.append(f"parallelism {self.parallelism():.2f}")
+        return "\n".join(lines)
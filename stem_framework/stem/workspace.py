@@ -1,14 +1,17 @@
 
 from abc import abstractmethod, ABC, ABCMeta
+from functools import wraps
 from types import ModuleType
-from typing import Optional, Any, TypeVar, Union
-from typing_extensions import Self
+from typing import Optional, Any, TypeVar, Union, TYPE_CHECKING
 from .core import Named
 from .meta import Meta
 from .task import Task
 from importlib import import_module
 T = TypeVar("T")
 
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
 
 class TaskPath:
     def __init__(self, path: Union[str, list[str]]):
@@ -37,6 +40,37 @@ class TaskPath:
         return ".".join(self._path)
 
 
+_generation = 0  # bumped by every change of a TaskDict or WorkspaceSet
+
+
+def _changing(method):
+    @wraps(method)
+    def change(self, *args, **kwargs):
+        global _generation
+        _generation += 1
+        return method(self, *args, **kwargs)
+    return change
+
+
+class _Tracked:
+    """Container whose changes invalidate the indexes of every workspace."""
+    CHANGES: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls.CHANGES:
+            setattr(cls, name, _changing(getattr(cls, name)))
+
+
+class TaskDict(_Tracked, dict):
+    CHANGES = ("__setitem__", "__delitem__", "__ior__", "clear", "pop", "popitem", "setdefault", "update")
+
+
+class WorkspaceSet(_Tracked, set):
+    CHANGES = ("add", "discard", "remove", "pop", "clear", "update", "difference_update",
+               "intersection_update", "symmetric_difference_update", "__ior__", "__iand__", "__isub__", "__ixor__")
+
+
 class ProxyTask(Task[T]):
 
     def __init__(self, proxy_name, task: Task):
@@ -51,6 +85,14 @@ class ProxyTask(Task[T]):
     def specification(self):
         return self._task.specification
 
+    @property
+    def settings(self):
+        return self._task.settings
+
+    @property
+    def is_async(self) -> bool:
+        return self._task.is_async
+
     def check_by_meta(self, meta: Meta):
         self._task.check_by_meta(meta)
 
@@ -70,22 +112,8 @@ class IWorkspace(ABC, Named):
     def workspaces(self) -> set["IWorkspace"]:
         pass
 
-    def find_task(cls, task_path: Union[str, TaskPath]) -> Optional[Task]:
-        if not isinstance(task_path, TaskPath):
-            task_path = TaskPath(task_path)
-        if not task_path.is_leaf:
-            for w in cls.workspaces:
-                if w.name == task_path.head:
-                    return w.find_task(task_path.sub_path)
-            return None
-        else:
-            for task_name in cls.tasks:
-                if task_name == task_path.name:
-                    return cls.tasks[task_name]
-            for w in cls.workspaces:
-                if t := w.find_task(task_path) is not None:
-                    return t
-            return None
+    def find_task(self, task_path: Union[str, TaskPath]) -> Optional[Task]:
+        return self._index()[0].get(str(task_path))
 
     def has_task(self, task_path: Union[str, TaskPath]) -> bool:
         return self.find_task(task_path) is not None
@@ -97,11 +125,43 @@ class IWorkspace(ABC, Named):
         return None
 
     def structure(self) -> dict:
-        return {
+        """Names of the tasks and sub-workspaces; the dict is cached and must not be changed."""
+        return self._index()[1]
+
+    def _index(self) -> tuple[dict[str, Task], dict]:
+        """Tasks by dotted path and by short name, with the structure, rebuilt when a workspace changes.
+
+        A short name is resolved to a task of the workspace itself before the
+        tasks of its sub-workspaces. The index is kept only while the tasks and
+        workspaces of the whole tree are a :class:`TaskDict` and a
+        :class:`WorkspaceSet`, whose changes are seen; call :meth:`invalidate`
+        after changing other containers.
+        """
+        tasks, workspaces = self.tasks, self.workspaces
+        cached = getattr(self, "_stem_index", None)
+        if cached is not None and cached[0] == _generation and cached[1] is tasks and cached[2] is workspaces:
+            return cached[3], cached[4]
+
+        index = dict(tasks)
+        tracked = isinstance(tasks, TaskDict) and isinstance(workspaces, WorkspaceSet)
+        for w in workspaces:
+            for path, task in w._index()[0].items():
+                index.setdefault(f"{w.name}.{path}", task)
+                if "." not in path:
+                    index.setdefault(path, task)
+            tracked = tracked and getattr(w, "_stem_index", None) is not None
+        structure = {
             "name": self.name,
-            "tasks": list(self.tasks.keys()),
-            "workspaces": [w.structure() for w in self.workspaces]
+            "tasks": list(tasks.keys()),
+            "workspaces": [w.structure() for w in workspaces]
         }
+        self._stem_index = (_generation, tasks, workspaces, index, structure) if tracked else None
+        return index, structure
+
+    def invalidate(self):
+        """Drop the indexes of every workspace."""
+        global _generation
+        _generation += 1
 
     @staticmethod
     def find_default_workspace(task: Task) -> "IWorkspace":
@@ -125,11 +185,11 @@ class IWorkspace(ABC, Named):
                 t = getattr(module, s)
                 if isinstance(t, Task):
                     tasks[s] = t
-                if isinstance(t, IWorkspace):
+                if IWorkspace in type(t).__mro__:
                     workspaces.add(t)
     
             module.__stem_workspace = LocalWorkspace(
-                module.__name__, tasks, workspaces
+                module.__name__.rpartition(".")[2], tasks, workspaces
             )
     
             return module.__stem_workspace
@@ -150,31 +210,27 @@ class LocalWorkspace(ILocalWorkspace):
 
     def __init__(self, name,  tasks=(), workspaces=()):
         self._name = name
-        self._tasks = tasks
-        self._workspaces = workspaces
+        self._tasks = TaskDict(tasks)
+        self._workspaces = WorkspaceSet(workspaces)
 
 
 class Workspace(ABCMeta, ILocalWorkspace):
-    def __new__(mcls: type[Self], name: str, bases: tuple[type, ...],
-                namespace: dict[str, Any], **kwargs: Any) -> Self:
-        #p.2
-        if ILocalWorkspace not in bases:
+    def __new__(mcls: "type[Self]", name: str, bases: tuple[type, ...],
+                namespace: dict[str, Any], **kwargs: Any) -> ILocalWorkspace:
+        #p.2 the class statement makes the single instance of a local workspace class
+        if not any(issubclass(b, ILocalWorkspace) for b in bases):
             bases += (ILocalWorkspace,)
-        cls = super().__new__(ABCMeta, name, bases, namespace, **kwargs)
         #need have workspaces p.6
-        try:
-            workspaces = set(cls.workspaces)
-        except AttributeError:
-            workspaces = set()
-        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
-
+        workspaces = set(namespace.get("workspaces", ()))
+        cls = ABCMeta(name, bases, {k: v for k, v in namespace.items() if k != "workspaces"}, **kwargs)
+        workspace = object.__new__(cls)
 
         cls_dict = {s: d for s, d in cls.__dict__.items() if not s.startswith('__')}
 #p.3-4
         tasks_to_replace = {
             s: ProxyTask(s, d)
             for s, d in cls_dict.items() 
-            if not callable(d) and isinstance(d, Task)
+            if isinstance(d, Task)
         }
 
         for s, t in tasks_to_replace.items():
@@ -183,7 +239,7 @@ class Workspace(ABCMeta, ILocalWorkspace):
         # p.5
         for s, d in cls_dict.items():
             if isinstance(d, Task):
-                d._stem_workspace = cls 
+                d._stem_workspace = workspace
 
 
         tasks_to_show = {
@@ -193,12 +249,12 @@ class Workspace(ABCMeta, ILocalWorkspace):
         }
 
 
-        cls._tasks = tasks_to_show      
-        cls._workspaces = workspaces    
-        cls._name = name             
-        def __new(userclass, *args, **kwargs):
-            return userclass
+        workspace._tasks = TaskDict(tasks_to_show)
+        workspace._workspaces = WorkspaceSet(workspaces)
+        workspace._name = name
+        def __call(self, *args, **kwargs):
+            return self
 
-        cls.__new__ = __new
+        cls.__call__ = __call
 #p.1
-        return cls
\ No newline at end of file
+        return workspace
@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import Iterator
+
+from stem.meta import Meta, get_meta_attr
+from stem.task import data, task
+
+
+DELAY = 0.3
+
+
+@data
+def slow_left(meta: Meta) -> int:
+    time.sleep(DELAY)
+    return 1
+
+
+@data
+def slow_right(meta: Meta) -> int:
+    time.sleep(DELAY)
+    return 2
+
+
+@task
+def slow_sum(meta: Meta, slow_left: int, slow_right: int) -> int:
+    return slow_left + slow_right
+
+
+@data
+async def remote_left(meta: Meta) -> int:
+    await asyncio.sleep(DELAY)
+    return 1
+
+
+@data
+async def remote_right(meta: Meta) -> int:
+    await asyncio.sleep(DELAY)
+    return 2
+
+
+@task
+async def remote_sum(meta: Meta, remote_left: int, remote_right: int) -> int:
+    return remote_left + remote_right
+
+
+@data
+def failing(meta: Meta) -> int:
+    time.sleep(0.05)
+    raise ValueError("failing")
+
+
+LOADS = []
+
+
+@data
+def shared_loader(meta: Meta) -> Iterator[int]:
+    LOADS.append(meta)
+    return iter(range(get_meta_attr(meta, "stop", 10)))
+
+
+@task
+def loader_sum(meta: Meta, shared_loader: Iterator[int]) -> int:
+    return sum(shared_loader)
+
+
+@task
+def loader_count(meta: Meta, shared_loader: Iterator[int]) -> int:
+    return len(list(shared_loader))
+
+
+@task
+def loader_diamond(meta: Meta, loader_sum: int, loader_count: int) -> tuple[int, int]:
+    return loader_sum, loader_count
@@ -0,0 +1,59 @@
+import json
+from unittest import TestCase
+
+from benchmarks.dag import Cost, build, SHAPES
+from benchmarks.suite import Config, compare, idle_time, percentiles, run_suite, runners
+from stem.task_master import TaskMaster
+from stem.task_runner import SimpleRunner
+from stem.trace import Span
+
+
+def span(started: float, finished: float) -> Span:
+    return Span("node", {}, started, started, finished, 1, 1)
+
+
+class BenchmarkTest(TestCase):
+
+    def test_shapes(self):
+        for shape in SHAPES:
+            with self.subTest(shape=shape):
+                synthetic = build(shape, 20, Cost(size=16))
+                self.assertLessEqual(synthetic.size, 20)
+                self.assertIs(synthetic.workspace.find_task("root"), synthetic.root)
+                result = TaskMaster(SimpleRunner()).execute({}, synthetic.root, synthetic.workspace)
+                self.assertEqual(result.data, bytes(16))
+        self.assertEqual(len(build("wide", 20).root.dependencies), 19)
+        self.assertEqual(len(build("deep", 20).root.dependencies), 1)
+        names = [[t.name for t in build("random", 20, seed=1).root.dependencies] for _ in range(2)]
+        self.assertEqual(names[0], names[1])
+
+    def test_runners(self):
+        self.assertTrue({"simple", "threading", "async", "streaming", "processing", "hybrid"} <= set(runners()))
+        self.assertNotIn("executor", runners())
+
+    def test_figures(self):
+        self.assertEqual(percentiles([3.0, 1.0, 2.0])["p50"], 2.0)
+        self.assertEqual(idle_time([span(1, 2), span(1.5, 3), span(4, 5)], 0, 6), 3)
+
+    def test_suite(self):
+        config = Config(shapes=("diamond",), runners=("simple", "threading"), nodes=8, repeat=2,
+                        cost=Cost(sleep=0.001))
+        report = json.loads(json.dumps(run_suite(config)))
+        self.assertEqual([r["runner"] for r in report["results"]], ["SimpleRunner", "ThreadingRunner"])
+        for result in report["results"]:
+            self.assertNotIn("error", result)
+            self.assertEqual(result["runs"], 2)
+            self.assertGreater(result["throughput"], 0)
+            self.assertLessEqual(result["latency"]["p50"], result["latency"]["p99"])
+        self.assertTrue(report["config"]["isolate"])
+        self.assertEqual(Config.from_record(report["config"]), config)
+        rows = compare(report, report)
+        self.assertEqual([row["throughput"] for row in rows], [1.0, 1.0])
+        with self.assertRaises(ValueError):
+            run_suite(Config(runners=("missing",)))
+
+    def test_in_process(self):
+        config = Config(shapes=("wide",), runners=("simple",), nodes=4, repeat=1, isolate=False)
+        result, = run_suite(config)["results"]
+        self.assertNotIn("error", result)
+        self.assertEqual(result["runs"], 1)
@@ -0,0 +1,174 @@
+import json
+import tempfile
+from functools import partial
+from operator import add
+from pathlib import Path
+from typing import Iterator
+from unittest import TestCase
+
+import numpy as np
+
+from stem.cache import DiskCache, MemoryCache, MISSING, result_key, approximate_size
+from stem.meta import Meta, get_meta_attr
+from stem.task import data, task, MapTask, ReduceTask
+from stem.task_master import TaskMaster
+from stem.task_runner import SimpleRunner, ThreadingRunner, AsyncRunner
+from tests.example_task import int_range
+
+CALLS = []
+
+
+@data
+def cached_range(meta: Meta) -> Iterator[int]:
+    CALLS.append("cached_range")
+    return iter(range(get_meta_attr(meta, "stop", 10)))
+
+
+@task
+def cached_sum(meta: Meta, cached_range: Iterator[int]) -> int:
+    CALLS.append("cached_sum")
+    return sum(cached_range) * get_meta_attr(meta, "factor", 1)
+
+
+class DiskCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_put_get(self):
+        cache = DiskCache(self.directory.name)
+        self.assertIs(cache.get("a"), MISSING)
+        self.assertEqual(cache.put("a", {"x": 1}), {"x": 1})
+        self.assertEqual(list(cache.put("b", iter(range(3)))), [0, 1, 2])
+        reopened = DiskCache(self.directory.name)
+        self.assertEqual(reopened.get("a"), {"x": 1})
+        self.assertIsInstance(reopened.get("b"), Iterator)
+        self.assertEqual(list(reopened.get("b")), [0, 1, 2])
+
+    def test_eviction(self):
+        cache = DiskCache(self.directory.name, max_size=3500)
+        for key in "abc":
+            cache.put(key, bytes(1000))
+        cache.get("a")
+        cache.put("d", bytes(1000))
+        self.assertIsNot(cache.get("a"), MISSING)
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertLessEqual(cache.size, 3500)
+
+    def test_reads_do_not_write_index(self):
+        cache = DiskCache(self.directory.name)
+        cache.put("a", 1)
+        index = Path(self.directory.name) / DiskCache.INDEX
+        saved = index.read_text()
+        for _ in range(3):
+            self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(index.read_text(), saved)
+        cache.close()
+        self.assertNotEqual(index.read_text(), saved)
+
+    def test_shared_directory(self):
+        first, second = DiskCache(self.directory.name, 2500), DiskCache(self.directory.name, 2500)
+        first.put("a", bytes(1000))
+        second.put("b", bytes(1000))
+        self.assertEqual(first.get("b"), bytes(1000))
+        self.assertEqual(set(json.loads((Path(self.directory.name) / DiskCache.INDEX).read_text())), {"a", "b"})
+        first.put("c", bytes(1000))
+        self.assertLessEqual(DiskCache(self.directory.name).size, 2500)
+        self.assertIs(second.get("a"), MISSING)
+
+    def test_result_key(self):
+        self.assertEqual(result_key(cached_sum, {"factor": 2}), result_key(cached_sum, {"factor": 2}))
+        self.assertNotEqual(result_key(cached_sum, {"factor": 2}), result_key(cached_sum, {"factor": 3}))
+        self.assertIsNone(result_key(cached_sum, {"factor": object()}))
+        self.assertIsNone(result_key(cached_sum, {}, (None,)))
+
+    def test_class_task_parameters(self):
+        cache = DiskCache(self.directory.name)
+        times_ten = MapTask(lambda x: x * 10, int_range)
+        plus_one = MapTask(lambda x: x + 1, int_range)
+        self.assertEqual(list(TaskMaster(cache=cache).execute({}, times_ten).data), list(range(0, 100, 10)))
+        self.assertEqual(list(TaskMaster(cache=cache).execute({}, plus_one).data), list(range(1, 11)))
+        self.assertEqual(TaskMaster(cache=cache).execute({}, ReduceTask(add, int_range)).data, 45)
+        self.assertEqual(TaskMaster(cache=cache).execute({}, ReduceTask(max, int_range)).data, 9)
+        self.assertNotEqual(result_key(ReduceTask(add, int_range, chunk_size=8), {}),
+                            result_key(ReduceTask(add, int_range, chunk_size=16), {}))
+        self.assertEqual(result_key(MapTask(abs, int_range), {}), result_key(MapTask(abs, int_range), {}))
+
+    def test_recursive_closure(self):
+        def collatz(x):
+            return 0 if x <= 1 else 1 + collatz(x // 2 if x % 2 == 0 else 3 * x + 1)
+
+        cache = DiskCache(self.directory.name)
+        steps = MapTask(collatz, int_range)
+        self.assertEqual(list(TaskMaster(cache=cache).execute({}, steps).data)[:4], [0, 0, 1, 7])
+        self.assertEqual(result_key(steps, {}), result_key(MapTask(collatz, int_range), {}))
+
+    def test_large_array_parameters(self):
+        cache = DiskCache(self.directory.name)
+        a, b = np.zeros(10_000), np.zeros(10_000)
+        b[5000] = 1
+        self.assertEqual(repr(a), repr(b))
+        first = MapTask(partial(np.multiply, a), int_range)
+        second = MapTask(partial(np.multiply, b), int_range)
+        self.assertNotEqual(result_key(first, {}), result_key(second, {}))
+        self.assertEqual(next(TaskMaster(cache=cache).execute({}, first).data)[5000], 0)
+        self.assertEqual(list(TaskMaster(cache=cache).execute({}, second).data)[1][5000], 1)
+
+    def test_task_master(self):
+        for runner in SimpleRunner(), ThreadingRunner(), AsyncRunner():
+            with self.subTest(runner=type(runner).__name__), runner:
+                DiskCache(self.directory.name).clear()
+                CALLS.clear()
+                meta = {"factor": 2, "cached_range": {"stop": 5}}
+                first = TaskMaster(runner, cache=DiskCache(self.directory.name)).execute(meta, cached_sum)
+                self.assertEqual(first.data, 20)
+                self.assertEqual(CALLS, ["cached_range", "cached_sum"])
+
+                second = TaskMaster(runner, cache=DiskCache(self.directory.name)).execute(meta, cached_sum)
+                self.assertEqual(second.data, 20)
+                self.assertEqual(CALLS, ["cached_range", "cached_sum"])
+
+                CALLS.clear()
+                meta["factor"] = 3
+                third = TaskMaster(runner, cache=DiskCache(self.directory.name)).execute(meta, cached_sum)
+                self.assertEqual(third.data, 30)
+                self.assertEqual(CALLS, ["cached_sum"])
+
+
+class MemoryCacheTest(TestCase):
+
+    def test_budget(self):
+        cache = MemoryCache(max_bytes=3 * 8000 + 500)
+        for key in "abc":
+            cache.put(key, np.zeros(1000))
+        self.assertIsNot(cache.get("a"), MISSING)
+        cache.put("d", np.zeros(1000))
+        self.assertIs(cache.get("b"), MISSING)
+        cache.put("e", np.zeros(10000))
+        self.assertIs(cache.get("e"), MISSING)
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 2, "evictions": 1, "entries": 3, "bytes": 24000})
+
+    def test_iterator(self):
+        cache = MemoryCache()
+        self.assertEqual(list(cache.put("a", iter(range(3)))), [0, 1, 2])
+        self.assertEqual(list(cache.get("a")), [0, 1, 2])
+        self.assertEqual(list(cache.get("a")), [0, 1, 2])
+        self.assertGreater(approximate_size([1, [2, 3]]), approximate_size([1]))
+
+    def test_task_master(self):
+        CALLS.clear()
+        task_master = TaskMaster(memory_cache=MemoryCache())
+        meta = {"cached_range": {"stop": 5}}
+        self.assertEqual(task_master.execute(meta, cached_sum).data, 10)
+        miss = task_master.execute({"cached_range": {"stop": 6}}, cached_sum)
+        result = task_master.execute({"cached_range": {"stop": 5}}, cached_sum)
+        self.assertIs(result.task_node, miss.task_node)
+        self.assertIs(result.task_node.task, cached_sum)
+        self.assertEqual(result.meta, meta)
+        self.assertEqual(result.data, 10)
+        self.assertEqual(task_master.execute({}, cached_sum).data, 45)
+        self.assertEqual(CALLS, ["cached_range", "cached_sum"] * 2)
+        self.assertEqual(task_master.memory_cache.hits, 1)
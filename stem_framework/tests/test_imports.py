@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest import TestCase
+
+ROOT = Path(__file__).parents[1]
+
+HEAVY = ("asyncio", "multiprocessing", "concurrent.futures", "numpy", "typing_extensions")
+
+
+def import_times(code: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module loaded by the code in a fresh interpreter."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+class ImportTest(TestCase):
+
+    def assertNotLoaded(self, code: str, modules=HEAVY):
+        times = import_times(code)
+        self.assertIn("stem", times)
+        for module in modules:
+            with self.subTest(module=module):
+                self.assertNotIn(module, times)
+
+    def test_core_modules(self):
+        for module in ("stem.meta", "stem.task", "stem.workspace", "stem.task_tree"):
+            with self.subTest(module=module):
+                self.assertNotLoaded(f"import {module}")
+
+    def test_task_master(self):
+        self.assertNotLoaded("import stem.task_master", HEAVY + ("stem.task_runner",))
+
+    def test_simple_run(self):
+        code = (
+            "from stem.task import data, task\n"
+            "from stem.task_master import TaskMaster\n"
+            "@data\n"
+            "def source(meta): return 2\n"
+            "@task\n"
+            "def double(meta, source): return 2 * source\n"
+            "assert TaskMaster().execute({}, double).data == 4\n"
+        )
+        self.assertNotLoaded(code, ("asyncio", "multiprocessing", "numpy"))
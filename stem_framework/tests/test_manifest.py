@@ -0,0 +1,86 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from stem.cli_main import create_parser
+from stem.manifest import load_manifest, manifest_path
+
+WORKSPACE = '''
+from stem.task import data, task
+
+with open({log!r}, "a") as log:
+    log.write("imported\\n")
+
+
+@data
+def source(meta):
+    return 1
+
+
+@task
+def doubled(meta, source):
+    return 2 * source
+'''
+
+
+class ManifestTest(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.log = Path(self.directory.name) / "imports.log"
+        self.source = Path(self.directory.name) / "manifest_workspace.py"
+        self.source.write_text(WORKSPACE.format(log=str(self.log)))
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _cli(self, *argv: str) -> str:
+        args = create_parser().parse_args(["-w", str(self.source), *argv])
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            args.func(args)
+        return output.getvalue()
+
+    def _imports(self) -> int:
+        return len(self.log.read_text().splitlines()) if self.log.exists() else 0
+
+    def test_structure_from_manifest(self):
+        first = self._cli("structure")
+        self.assertEqual(self._imports(), 1)
+        self.assertTrue(manifest_path(self.source).exists())
+        self.assertEqual(self._cli("structure"), first)
+        self.assertEqual(self._imports(), 1)
+        self.assertEqual(load_manifest(self.source)["tasks"]["doubled"]["dependencies"], ["source"])
+
+    def test_stale(self):
+        self._cli("structure")
+        self.source.write_text(self.source.read_text() + "\n\nother = source\n")
+        self.assertIsNone(load_manifest(self.source))
+        self.assertIn("other", self._cli("structure"))
+        self.assertEqual(self._imports(), 2)
+
+    def test_touched(self):
+        self._cli("structure")
+        stat = self.source.stat()
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertIsNotNone(load_manifest(self.source))
+
+    def test_run_trace(self):
+        trace = Path(self.directory.name) / "trace.json"
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            self.assertEqual(self._cli("run", "doubled", "-t", str(trace)), "2\n")
+        with open(trace) as file:
+            names = sorted(event["name"] for event in json.load(file)["traceEvents"])
+        self.assertEqual(names, ["doubled", "source"])
+        self.assertIn("parallelism", errors.getvalue())
+
+    def test_unknown_task(self):
+        self._cli("structure")
+        with self.assertRaises(ValueError):
+            self._cli("run", "missing")
+        self.assertEqual(self._imports(), 1)
@@ -0,0 +1,145 @@
+import time
+import tracemalloc
+from unittest import TestCase
+
+from stem.cancel import check_cancelled
+from stem.memory import MemoryLimitExceeded, MemoryMeter
+from stem.meta import Meta
+from stem.task import data, task
+from stem.task_master import TaskMaster, TaskStatus
+from stem.task_runner import SimpleRunner, ThreadingRunner, AsyncRunner, StreamingRunner, ProcessingRunner
+from stem.trace import TraceRecorder
+
+MB = 1 << 20
+
+
+@data
+def archive(meta: Meta) -> int:
+    chunk = bytearray(8 * MB)
+    return len(chunk)
+
+
+@task
+def archive_size(meta: Meta, archive: int) -> int:
+    return archive
+
+
+@data(memory_limit=MB)
+def greedy(meta: Meta) -> int:
+    return len(bytearray(8 * MB))
+
+
+@data
+def stage_0(meta: Meta) -> bytearray:
+    return bytearray(20 * MB)
+
+
+@task
+def stage_1(meta: Meta, stage_0: bytearray) -> bytearray:
+    return bytearray(len(stage_0))
+
+
+@task
+def stage_2(meta: Meta, stage_1: bytearray) -> bytearray:
+    return bytearray(len(stage_1))
+
+
+@task
+def stage_3(meta: Meta, stage_2: bytearray) -> bytearray:
+    return bytearray(len(stage_2))
+
+
+@task
+def stage_4(meta: Meta, stage_3: bytearray) -> bytearray:
+    return bytearray(len(stage_3))
+
+
+@task
+def stage_5(meta: Meta, stage_4: bytearray) -> int:
+    return len(stage_4)
+
+
+CHUNKS = []
+
+
+@data(memory_limit=4 * MB)
+def hoarder(meta: Meta) -> int:
+    chunks = []
+    for _ in range(100):
+        chunks.append(bytearray(MB // 2))
+        CHUNKS.append(len(chunks))
+        time.sleep(0.01)
+        check_cancelled()
+    return len(chunks)
+
+
+class MemoryTest(TestCase):
+
+    def test_meter(self):
+        with MemoryMeter("block") as meter:
+            kept = bytearray(2 * MB)
+            bytearray(8 * MB)
+        self.assertGreaterEqual(meter.usage.peak, 8 * MB)
+        self.assertLess(meter.usage.peak, 12 * MB)
+        self.assertGreaterEqual(meter.usage.retained, 2 * MB)
+        self.assertLess(meter.usage.retained, 3 * MB)
+        del kept
+
+    def test_overlapping_meters(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        with MemoryMeter("outer") as outer:
+            bytearray(8 * MB)
+            with MemoryMeter("inner") as inner:
+                bytearray(2 * MB)
+            self.assertTrue(tracemalloc.is_tracing())
+        self.assertGreaterEqual(outer.usage.peak, 8 * MB)
+        self.assertGreater(inner.usage.peak, 2 * MB - 1024)
+        self.assertLess(inner.usage.peak, 3 * MB)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_result_memory(self):
+        runners = SimpleRunner(), ThreadingRunner(), AsyncRunner(), StreamingRunner(), ProcessingRunner(1)
+        for runner in runners:
+            with self.subTest(runner=type(runner).__name__), runner:
+                result = TaskMaster(runner, measure_memory=True).execute({}, archive_size)
+                self.assertEqual(result.data, 8 * MB)
+                self.assertEqual(set(result.memory), {"archive", "archive_size"})
+                self.assertGreaterEqual(result.memory["archive"].peak, 8 * MB)
+                self.assertLess(result.memory["archive_size"].peak, MB)
+        self.assertIsNone(TaskMaster(SimpleRunner()).execute({}, archive_size).memory)
+
+    def test_traced_memory(self):
+        recorder = TraceRecorder(memory=True)
+        with ThreadingRunner(tracer=recorder) as runner:
+            TaskMaster(runner).execute({}, archive_size).data
+        peaks = {span.name: span.memory.peak for span in recorder.spans}
+        self.assertGreaterEqual(peaks["archive"], 8 * MB)
+        self.assertIn("peak memory", recorder.format_summary())
+
+    def test_intermediate_results_freed(self):
+        for runner in (SimpleRunner(), ThreadingRunner(), AsyncRunner()):
+            with self.subTest(runner=type(runner).__name__), runner:
+                tracemalloc.start()
+                try:
+                    self.assertEqual(TaskMaster(runner).execute({}, stage_5).data, 20 * MB)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                self.assertLess(peak, 4 * 20 * MB)
+
+    def test_limit(self):
+        for runner in (SimpleRunner(), ThreadingRunner(), ProcessingRunner(1)):
+            with self.subTest(runner=type(runner).__name__), runner:
+                result = TaskMaster(runner).execute({}, greedy)
+                with self.assertRaises(MemoryLimitExceeded):
+                    result.data
+                self.assertEqual(result.status, TaskStatus.INVOCATION_ERROR)
+
+    def test_limit_cancels(self):
+        for runner in (SimpleRunner(), ThreadingRunner(), ProcessingRunner(1)):
+            with self.subTest(runner=type(runner).__name__), runner:
+                CHUNKS.clear()
+                with self.assertRaises(MemoryLimitExceeded):
+                    TaskMaster(runner).execute({}, hoarder).data
+                if not isinstance(runner, ProcessingRunner):
+                    self.assertLess(len(CHUNKS), 20)
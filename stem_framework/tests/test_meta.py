@@ -1,7 +1,7 @@
 import dataclasses
 from unittest import TestCase
 
-from stem.meta import MetaVerification, update_meta, get_meta_attr
+from stem.meta import MetaVerification, update_meta, get_meta_attr, freeze_meta
 
 
 @dataclasses.dataclass
@@ -44,3 +44,9 @@ class CoreTest(TestCase):
 
         verification = MetaVerification.verify(example_dict, specification)
         self.assertFalse(verification.checked_success)
+
+    def test_freeze_meta(self):
+        self.assertEqual(freeze_meta({"a": 1, "b": {"c": [1, 2]}}), freeze_meta({"b": {"c": [1, 2]}, "a": 1}))
+        self.assertNotEqual(freeze_meta({"a": 1}), freeze_meta({"a": 1.0}))
+        self.assertNotEqual(freeze_meta(Example()), freeze_meta(dataclasses.asdict(Example())))
+        hash(freeze_meta(Example(c=[{"d": 1}])))
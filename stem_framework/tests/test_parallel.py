@@ -0,0 +1,121 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count, islice
+from unittest import TestCase
+
+from operator import add
+
+from stem.parallel import parallel_map, iter_batches, iter_reduce, tree_reduce, chunk_size_for, get_pool, \
+    shutdown_pool, CHUNK_SIZE, MAX_CHUNK_SIZE, MAX_WORKERS
+from stem.task import ParallelMapTask, ReduceTask, CPU
+from stem.task_master import TaskMaster
+from stem.task_runner import HybridRunner
+from tests.example_task import int_range
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+def pid(_) -> int:
+    return os.getpid()
+
+
+def concat(x: str, y: str) -> str:
+    return x + y
+
+
+class ParallelMapTest(TestCase):
+
+    def test_iter_batches(self):
+        self.assertEqual(list(iter_batches(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_order(self):
+        self.assertEqual(list(parallel_map(square, range(1000), chunk_size=7)), [x * x for x in range(1000)])
+
+    def test_lazy(self):
+        consumed = []
+
+        def source():
+            for i in count():
+                consumed.append(i)
+                yield i
+
+        with ProcessPoolExecutor(2) as executor:
+            result = parallel_map(square, source(), chunk_size=10, max_in_flight=3, executor=executor)
+            self.assertEqual(list(islice(result, 15)), [x * x for x in range(15)])
+            self.assertLessEqual(len(consumed), 50)
+            result.close()
+
+    def test_workers(self):
+        self.assertNotIn(os.getpid(), set(parallel_map(pid, range(100), chunk_size=10)))
+
+    def test_task(self):
+        task = ParallelMapTask(square, int_range, chunk_size=3)
+        self.assertEqual(task.name, "map_int_range")
+        self.assertEqual(list(TaskMaster().execute({}, task).data), [x * x for x in range(10)])
+
+    def test_shared_pool(self):
+        pool = get_pool()
+        self.assertIs(get_pool(), pool)
+        self.assertEqual(pool._max_workers, MAX_WORKERS)
+        shutdown_pool()
+        self.assertIsNot(get_pool(), pool)
+        with self.assertRaises(RuntimeError):
+            pool.submit(square, 2)
+
+    def test_runner_pool(self):
+        task = ParallelMapTask(pid, int_range, chunk_size=1)
+        with HybridRunner(cpu_workers=2) as runner:
+            pids = set(TaskMaster(runner).execute({}, task).data)
+            self.assertLessEqual(pids, set(runner._pools[CPU]._processes))
+
+
+class TreeReduceTest(TestCase):
+
+    def test_sum(self):
+        self.assertEqual(tree_reduce(add, range(10000), chunk_size=100), sum(range(10000)))
+        self.assertEqual(tree_reduce(add, range(10000), chunk_size=100, commutative=True), sum(range(10000)))
+
+    def test_order(self):
+        letters = [chr(ord("a") + i % 26) for i in range(500)]
+        self.assertEqual(tree_reduce(concat, letters, chunk_size=7, max_in_flight=3), "".join(letters))
+
+    def test_combined_on_pool(self):
+        threads = set()
+
+        def traced_concat(x: str, y: str) -> str:
+            threads.add(threading.get_ident())
+            return x + y
+
+        letters = [chr(ord("a") + i % 26) for i in range(500)]
+        for commutative in (False, True):
+            with ThreadPoolExecutor(4) as executor:
+                result = tree_reduce(traced_concat, letters, chunk_size=7, commutative=commutative,
+                                     executor=executor)
+            self.assertEqual(sorted(result), sorted(letters))
+            if not commutative:
+                self.assertEqual(result, "".join(letters))
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_chunk_size(self):
+        self.assertEqual(chunk_size_for(range(100), 5), 5)
+        self.assertEqual(chunk_size_for(range(3), 8), 1)
+        self.assertEqual(chunk_size_for(range(1 << 30), 8), MAX_CHUNK_SIZE)
+        self.assertEqual(chunk_size_for(iter(range(100)), 5), CHUNK_SIZE)
+        self.assertEqual(tree_reduce(add, range(100)), sum(range(100)))
+
+    def test_empty(self):
+        with self.assertRaises(TypeError):
+            tree_reduce(add, [])
+
+    def test_partials(self):
+        self.assertEqual(list(iter_reduce(add, range(10), chunk_size=3)), [3, 15, 36, 45])
+
+    def test_task(self):
+        task = ReduceTask(add, int_range, associative=True, chunk_size=3)
+        self.assertEqual(TaskMaster().execute({}, task).data, 45)
+        with HybridRunner(cpu_workers=2) as runner:
+            self.assertEqual(TaskMaster(runner).execute({}, task).data, 45)
+            self.assertIn(CPU, runner._pools)
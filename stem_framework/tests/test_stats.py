@@ -0,0 +1,48 @@
+import tempfile
+from functools import partial
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from stem.task import MapTask
+from stem.stats import StatsStore, meta_shape, DEFAULT_TIME
+from tests.example_task import int_range, int_scale
+
+
+class StatsStoreTest(TestCase):
+
+    def test_meta_shape(self):
+        self.assertEqual(meta_shape({"a": 1, "b": {"c": "x"}}), meta_shape({"b": {"c": "y"}, "a": 2}))
+        self.assertNotEqual(meta_shape({"a": 1}), meta_shape({"a": 1.0}))
+
+    def test_estimate(self):
+        stats = StatsStore()
+        self.assertEqual(stats.estimate(int_range, {}), DEFAULT_TIME)
+        stats.record(int_range, {}, 2.0, 100)
+        stats.record(int_range, {}, 4.0)
+        self.assertAlmostEqual(stats.estimate(int_range, {}), 2.6)
+        self.assertEqual(stats.get(int_range, {})["size"], 100)
+        self.assertAlmostEqual(stats.estimate(int_range, {"x": 1}), 2.6)
+        self.assertAlmostEqual(stats.estimate(int_scale, {}), 2.6)
+
+    def test_closure_task(self):
+        def depth(x):
+            return 0 if x < 2 else 1 + depth(x // 2)
+
+        a, b = np.zeros(10_000), np.zeros(10_000)
+        b[5000] = 1
+        stats = StatsStore()
+        stats.record(MapTask(depth, int_range), {}, 2.0)
+        stats.record(MapTask(partial(np.multiply, a), int_range), {}, 4.0)
+        self.assertAlmostEqual(stats.estimate(MapTask(depth, int_range), {}), 2.0)
+        self.assertIsNotNone(stats.get(MapTask(partial(np.multiply, a), int_range), {}))
+        self.assertIsNone(stats.get(MapTask(partial(np.multiply, b), int_range), {}))
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "stats" / "stats.json"
+            stats = StatsStore(path)
+            stats.record(int_scale, {}, 0.5)
+            stats.save()
+            self.assertEqual(StatsStore(path).estimate(int_scale, {}), 0.5)
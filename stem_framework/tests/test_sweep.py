@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+from itertools import count
+from unittest import TestCase
+
+from stem.cli_main import create_parser
+from stem.sweep import grid, apply_point, sweep, write_jsonl
+from stem.task_master import TaskMaster
+from tests.example_task import int_reduce
+from tests.fixtures import failing
+
+EXAMPLE_TASK = os.path.join(os.path.dirname(__file__), "example_task.py")
+
+
+class SweepTest(TestCase):
+
+    def test_grid(self):
+        self.assertEqual(list(grid({"a": [1, 2], "b.c": "xy"})),
+                         [{"a": 1, "b.c": "x"}, {"a": 1, "b.c": "y"}, {"a": 2, "b.c": "x"}, {"a": 2, "b.c": "y"}])
+
+    def test_apply_point(self):
+        base = {"int_scale": {"int_range": {"start": 1}}}
+        meta = apply_point(base, {"int_scale.int_range.stop": 5, "x": 0})
+        self.assertEqual(meta, {"int_scale": {"int_range": {"start": 1, "stop": 5}}, "x": 0})
+        self.assertEqual(base, {"int_scale": {"int_range": {"start": 1}}})
+
+    def test_sweep(self):
+        points = grid({"int_scale.int_range.stop": range(1, 11)})
+        results = list(sweep(TaskMaster(), int_reduce, points, workers=3))
+        self.assertEqual(sorted(r.index for r in results), list(range(10)))
+        for r in results:
+            stop = r.point["int_scale.int_range.stop"]
+            self.assertEqual(r.value, 10 * sum(range(stop)))
+
+    def test_bounded(self):
+        taken = []
+
+        def points():
+            for stop in count(1):
+                taken.append(stop)
+                yield {"int_scale.int_range.stop": stop}
+
+        results = sweep(TaskMaster(), int_reduce, points(), workers=2, max_in_flight=3)
+        for _ in range(5):
+            next(results)
+        self.assertLessEqual(len(taken), 8)
+        results.close()
+
+    def test_errors_recorded(self):
+        with tempfile.TemporaryFile("w+") as file:
+            self.assertEqual(write_jsonl(sweep(TaskMaster(), failing, [{}, {"x": 1}]), file), 2)
+            file.seek(0)
+            records = [json.loads(line) for line in file]
+        self.assertEqual({r["status"] for r in records}, {"INVOCATION_ERROR"})
+        self.assertIn("ValueError", records[0]["error"])
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "sweep.jsonl")
+            args = create_parser().parse_args([
+                "-w", EXAMPLE_TASK, "sweep", "int_reduce", "-m", '{"int_scale": {"data_scale": {}}}',
+                "-g", '{"int_scale.int_range.stop": [2, 3]}', "-o", output, "-j", "2"
+            ])
+            args.func(args)
+            with open(output) as file:
+                records = sorted((json.loads(line) for line in file), key=lambda r: r["index"])
+        self.assertEqual([r["result"] for r in records], [10, 30])
+        self.assertEqual(records[1]["point"], {"int_scale.int_range.stop": 3})
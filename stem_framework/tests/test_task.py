@@ -1,7 +1,12 @@
 from functools import reduce
 from unittest import TestCase
-from task import Task, MapTask, FilterTask, ReduceTask
-from tests.example_task import IntRange, int_range, int_scale, data_scale
+
+import numpy as np
+
+from stem.task import Task, MapTask, data, task, execution_class, FilterTask, ReduceTask, ArrayMapTask, ArrayFilterTask, ArrayReduceTask, \
+    iter_chunks
+from stem.task_master import TaskMaster
+from tests.example_task import IntRange, int_range, int_scale, data_scale, float_range
 
 
 class TaskTest(TestCase):
@@ -27,6 +32,20 @@ class TaskTest(TestCase):
                         int_scale.transform({}, int_range=int_range.data({}), data_scale=data_scale.data({}))):
             self.assertEqual(i, r)
 
+    def test_decorator_settings(self):
+        @task(execution="cpu", cache=False)
+        def with_locals(meta, int_range):
+            total = sum(int_range)
+            return total
+
+        self.assertEqual(with_locals.dependencies, ("int_range",))
+        self.assertEqual(with_locals.settings, {"execution": "cpu", "cache": False})
+        self.assertEqual(execution_class(with_locals), "cpu")
+        self.assertEqual(execution_class(int_range), "io")
+        self.assertIsNone(int_range.settings)
+        with self.assertRaises(ValueError):
+            execution_class(data(execution="gpu")(lambda meta: 1))
+
     def test_map_task(self):
         task = MapTask(lambda x: x * 10, int_range)
         self.assertEqual(task.name, "map_int_range")
@@ -45,4 +64,34 @@ class TaskTest(TestCase):
         self.assertEqual(reduce(lambda acc, x: acc + x, range(0, 10, 1)),
                          task.transform({}, int_range=int_range.data({})))
 
+    def test_iter_chunks(self):
+        chunks = list(iter_chunks(range(10), 4, "i8"))
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+        self.assertEqual(chunks[1].tolist(), [4, 5, 6, 7])
+        array = np.arange(10)
+        self.assertTrue(np.shares_memory(next(iter_chunks(array, 4)), array))
+        self.assertEqual(len(list(iter_chunks(iter(chunks), 3))), 3)
+
+    def test_array_map_task(self):
+        task = ArrayMapTask(lambda x: x * 10, int_range, chunk_size=4)
+        self.assertEqual(task.name, "map_int_range")
+        result = np.concatenate(list(task.transform({}, int_range=int_range.data({}))))
+        self.assertEqual(result.tolist(), list(range(0, 100, 10)))
+
+    def test_array_filter_task(self):
+        task = ArrayFilterTask(lambda x: x % 2 == 0, int_range, chunk_size=4)
+        result = np.concatenate(list(task.transform({}, int_range=int_range.data({}))))
+        self.assertEqual(result.tolist(), list(range(0, 10, 2)))
+
+    def test_array_reduce_task(self):
+        task = ArrayReduceTask(np.add, int_range, chunk_size=3)
+        self.assertEqual(task.name, "reduce_int_range")
+        self.assertEqual(task.transform({}, int_range=int_range.data({})), 45)
+        task = ArrayReduceTask(np.max, float_range, chunk_size=3, dtype="f4")
+        self.assertAlmostEqual(task.transform({}, float_range=float_range.data({})), 0.9, places=5)
 
+    def test_array_pipeline(self):
+        squares = ArrayMapTask(np.square, float_range, dtype="f4")
+        total = ArrayReduceTask(np.add, squares)
+        result = TaskMaster().execute({"map_float_range": {"float_range": {"stop": 2}}}, total).data
+        self.assertAlmostEqual(result, float(np.sum(np.square(np.arange(0, 2, 0.1, dtype="f4")))), places=3)
@@ -1,8 +1,11 @@
+import asyncio
+import time
 from unittest import TestCase
 
-from stem.task_master import TaskMaster
-from stem.task_runner import SimpleRunner
-from tests.example_task import int_scale
+from stem.task_master import TaskMaster, TaskStatus
+from stem.task_runner import SimpleRunner, ThreadingRunner, AsyncRunner, ProcessingRunner, StreamingRunner
+from tests.example_task import int_scale, int_reduce
+from tests.fixtures import LOADS as CALLS, loader_diamond, slow_sum, remote_sum, failing, DELAY
 
 
 class SimpleRunnerTest(TestCase):
@@ -14,4 +17,91 @@ class SimpleRunnerTest(TestCase):
         task_master = TaskMaster(self.runner)
         result = task_master.execute({}, int_scale)
         for i, r in zip(range(0, 100, 10), result.lazy_data()):
-            self.assertEqual(i, r)
\ No newline at end of file
+            self.assertEqual(i, r)
+
+class ReexecuteTest(TestCase):
+
+    def test_reexecute(self):
+        CALLS.clear()
+        task_master = TaskMaster(ThreadingRunner())
+        meta = {"loader_sum": {"shared_loader": {"stop": 5}}}
+        first = task_master.execute(meta, loader_diamond, retain=True)
+        self.assertEqual(first.data, (10, 10))
+        self.assertEqual(len(CALLS), 2)
+
+        self.assertIs(task_master.reexecute(first, meta), first)
+
+        CALLS.clear()
+        second = task_master.reexecute(first, {"loader_sum": {"shared_loader": {"stop": 6}}})
+        self.assertEqual(second.data, (15, 10))
+        self.assertEqual(second.changed, {"loader_sum.shared_loader.stop"})
+        self.assertEqual(CALLS, [{"stop": 6}])
+        self.assertEqual(second.results.reused, 1)
+
+        third = task_master.reexecute(second, {"loader_count": {"shared_loader": {"stop": 6}}})
+        self.assertEqual(third.data, (45, 6))
+        self.assertEqual(len(CALLS), 1)
+        self.assertEqual(third.results.reused, 2)
+
+    def test_not_retained(self):
+        task_master = TaskMaster()
+        with self.assertRaises(ValueError):
+            task_master.reexecute(task_master.execute({}, int_scale), {})
+
+
+class ExecuteManyTest(TestCase):
+
+    def test_shared_nodes(self):
+        metas = [{"loader_sum": {"shared_loader": {"stop": stop}}} for stop in (4, 5, 4)]
+        for runner in (SimpleRunner(), ThreadingRunner(), AsyncRunner(), StreamingRunner()):
+            with self.subTest(runner=type(runner).__name__), TaskMaster(runner) as task_master:
+                CALLS.clear()
+                results = dict(task_master.execute_many(metas, loader_diamond))
+                self.assertEqual({i: r.data for i, r in results.items()}, {0: (6, 10), 1: (10, 10), 2: (6, 10)})
+                self.assertEqual(len(CALLS), 3)
+
+    def test_overlap(self):
+        for runner, task, left in ((AsyncRunner(), remote_sum, "remote_left"),
+                                   (StreamingRunner(), slow_sum, "slow_left")):
+            with self.subTest(runner=type(runner).__name__), TaskMaster(runner) as task_master:
+                start = time.perf_counter()
+                results = dict(task_master.execute_many([{left: {"x": x}} for x in range(4)], task))
+                self.assertEqual({i: r.data for i, r in results.items()}, dict.fromkeys(range(4), 3))
+                self.assertLess(time.perf_counter() - start, 2 * DELAY)
+
+    def test_iterators(self):
+        with TaskMaster(ProcessingRunner(2)) as task_master:
+            results = dict(task_master.execute_many([{"int_range": {"stop": 3}}] * 2 + [{}], int_scale))
+        self.assertEqual([list(results[i].data) for i in range(3)], [[0, 10, 20], [0, 10, 20], list(range(0, 100, 10))])
+
+
+class SubmitTest(TestCase):
+
+    def test_overlap(self):
+        for runner in (SimpleRunner(), AsyncRunner()):
+            with self.subTest(runner=type(runner).__name__), TaskMaster(runner) as task_master:
+                start = time.perf_counter()
+                results = [task_master.submit({}, task) for task in (slow_sum, remote_sum, slow_sum)]
+                self.assertFalse(results[0].done())
+                self.assertEqual([r.result(timeout=5) for r in results], [3, 3, 3])
+                self.assertLess(time.perf_counter() - start, 3 * DELAY)
+
+    def test_callback_and_await(self):
+        done = []
+        with TaskMaster() as task_master:
+            result = task_master.submit({}, int_reduce)
+            result.add_done_callback(done.append)
+
+            async def wait():
+                return await result
+
+            self.assertEqual(asyncio.run(wait()), 450)
+            self.assertEqual(done, [result])
+            self.assertTrue(result.done())
+
+    def test_error(self):
+        with TaskMaster() as task_master:
+            result = task_master.submit({}, failing)
+            with self.assertRaises(ValueError):
+                result.result()
+            self.assertEqual(result.status, TaskStatus.INVOCATION_ERROR)
@@ -1,8 +1,203 @@
+import os
+import threading
+import time
 from unittest import TestCase
 
-from stem.task_master import TaskMaster
-from stem.task_runner import SimpleRunner, TaskRunner, ThreadingRunner, AsyncRunner, ProcessingRunner
+from typing import Iterator
+
+import numpy as np
+
+from stem.cache import MemoryCache
+from stem.cancel import current_token, check_cancelled
+from stem.meta import Meta, get_meta_attr
+from stem.stats import StatsStore
+from stem.task import data, task
+from stem.task_master import TaskMaster, TaskStatus
+from stem.task_runner import SimpleRunner, TaskRunner, ThreadingRunner, AsyncRunner, ProcessingRunner, \
+    StreamingRunner, HybridRunner
+from stem.trace import Tracer, TraceRecorder
 from tests.example_task import int_scale
+from tests.fixtures import slow_right, slow_sum, remote_left, remote_sum, failing, LOADS, loader_diamond, \
+    shared_loader, DELAY
+
+
+@task
+def mixed_sum(meta: Meta, remote_left: int, slow_right: int) -> int:
+    return remote_left + slow_right
+
+
+STARTED = []
+
+
+@data
+def quick(meta: Meta) -> int:
+    STARTED.append("quick")
+    return 1
+
+
+@data
+def deep_source(meta: Meta) -> int:
+    STARTED.append("deep_source")
+    return 1
+
+
+@task
+def deep_middle(meta: Meta, deep_source: int) -> int:
+    return deep_source + 1
+
+
+@task
+def critical(meta: Meta, quick: int, deep_middle: int) -> int:
+    return quick + deep_middle
+
+
+@data(execution="inline")
+def inline_thread(meta: Meta) -> int:
+    return threading.get_ident()
+
+
+@data
+def io_thread(meta: Meta) -> int:
+    return threading.get_ident()
+
+
+@data(execution="cpu")
+def cpu_process(meta: Meta) -> int:
+    return os.getpid()
+
+
+@task(execution="heavy")
+def heavy_sum(meta: Meta, int_scale: list[int]) -> int:
+    return sum(int_scale)
+
+
+@task(execution="inline")
+def hybrid_report(meta: Meta, inline_thread: int, io_thread: int, cpu_process: int, heavy_sum: int) -> tuple:
+    return inline_thread, io_thread, cpu_process, heavy_sum
+
+
+@data(execution="cpu", timeout=0.5)
+def cpu_nap_a(meta: Meta) -> int:
+    time.sleep(0.2)
+    return 1
+
+
+@data(execution="cpu", timeout=0.5)
+def cpu_nap_b(meta: Meta) -> int:
+    time.sleep(0.2)
+    return 1
+
+
+@data(execution="cpu", timeout=0.5)
+def cpu_nap_c(meta: Meta) -> int:
+    time.sleep(0.2)
+    return 1
+
+
+@task(execution="inline")
+def cpu_naps(meta: Meta, cpu_nap_a: int, cpu_nap_b: int, cpu_nap_c: int) -> int:
+    return cpu_nap_a + cpu_nap_b + cpu_nap_c
+
+
+CANCELLED = []
+
+
+@data
+def patient(meta: Meta) -> int:
+    current_token().wait(5)
+    CANCELLED.append(True)
+    check_cancelled()
+    return 1
+
+
+@data(execution="cpu")
+def slow_bytes(meta: Meta) -> bytes:
+    time.sleep(0.3)
+    return bytes(1 << 20)
+
+
+@task
+def abandoned_sum(meta: Meta, slow_bytes: bytes, failing: int) -> int:
+    return len(slow_bytes) + failing
+
+
+@task
+def fail_fast_sum(meta: Meta, patient: int, failing: int) -> int:
+    return patient + failing
+
+
+@data(timeout=0.2)
+def sleepy(meta: Meta) -> int:
+    current_token().wait(5)
+    check_cancelled()
+    return 1
+
+
+@data
+def big_stream(meta: Meta) -> Iterator[int]:
+    for i in range(200_000):
+        yield i
+
+
+@task
+def big_stream_sum(meta: Meta, big_stream: Iterator[int]) -> int:
+    return sum(big_stream)
+
+
+@task
+def big_stream_count(meta: Meta, big_stream: Iterator[int]) -> int:
+    return sum(1 for _ in big_stream)
+
+
+@task
+def big_stream_max(meta: Meta, big_stream: Iterator[int]) -> int:
+    return max(big_stream)
+
+
+@task
+def big_stream_report(meta: Meta, big_stream_sum: int, big_stream_count: int, big_stream_max: int) -> tuple:
+    return big_stream_sum, big_stream_count, big_stream_max
+
+
+PRODUCED = [0]
+
+
+@data
+def long_stream(meta: Meta) -> Iterator[int]:
+    for i in range(get_meta_attr(meta, "stop", 10 ** 6)):
+        PRODUCED[0] += 1
+        yield i
+
+
+@task
+def long_stream_squares(meta: Meta, long_stream: Iterator[int]) -> Iterator[int]:
+    return map(lambda x: x * x, long_stream)
+
+
+@data
+def broken_stream(meta: Meta) -> Iterator[int]:
+    yield 1
+    raise ValueError("broken")
+
+
+@task
+def broken_stream_sum(meta: Meta, broken_stream: Iterator[int]) -> int:
+    return sum(broken_stream)
+
+
+@data
+def big_array(meta: Meta) -> np.ndarray:
+    return np.arange(get_meta_attr(meta, "size", 1 << 20), dtype="f8")
+
+
+@task
+def doubled_array(meta: Meta, big_array: np.ndarray) -> np.ndarray:
+    return big_array * 2
+
+
+@data
+def worker_pid(meta: Meta) -> int:
+    return os.getpid()
 
 
 class RunnerTest(TestCase):
@@ -21,10 +216,207 @@ class RunnerTest(TestCase):
         runner = ThreadingRunner()
         self._run(runner)
 
+    def test_threading_branches_overlap(self):
+        with ThreadingRunner() as runner:
+            for _ in range(2):
+                start = time.perf_counter()
+                result = TaskMaster(runner).execute({}, slow_sum)
+                self.assertEqual(result.data, 3)
+                self.assertLess(time.perf_counter() - start, 2 * DELAY)
+
+    def test_critical_path_first(self):
+        STARTED.clear()
+        with ThreadingRunner(1) as runner:
+            self.assertEqual(TaskMaster(runner).execute({}, critical).data, 3)
+        self.assertEqual(STARTED, ["deep_source", "quick"])
+
+        stats = StatsStore()
+        stats.record(quick, {}, 10.0)
+        for fast in (deep_source, deep_middle, critical):
+            stats.record(fast, {}, 0.1)
+        STARTED.clear()
+        with ThreadingRunner(1, stats) as runner:
+            self.assertEqual(TaskMaster(runner).execute({}, critical).data, 3)
+        self.assertEqual(STARTED, ["quick", "deep_source"])
+        self.assertEqual(stats.get(deep_middle, {})["runs"], 2)
+
     def test_async(self):
         runner = AsyncRunner()
         self._run(runner)
 
+    def test_async_coroutines_overlap(self):
+        with AsyncRunner() as runner:
+            for task in (remote_sum, mixed_sum, remote_sum):
+                start = time.perf_counter()
+                self.assertEqual(TaskMaster(runner).execute({}, task).data, 3)
+                self.assertLess(time.perf_counter() - start, 2 * DELAY)
+
+    def test_coroutines_in_sync_runners(self):
+        for runner in (SimpleRunner(), ThreadingRunner()):
+            with self.subTest(runner=type(runner).__name__):
+                self.assertEqual(TaskMaster(runner).execute({}, remote_sum).data, 3)
+
+    def test_streaming(self):
+        runner = StreamingRunner()
+        self._run(runner)
+        self.assertEqual(TaskMaster(runner).execute({}, loader_diamond).data, (45, 10))
+
+    def test_streaming_backpressure(self):
+        PRODUCED[0] = 0
+        meta = {"long_stream": {"stop": 10 ** 5}}
+        stream = TaskMaster(StreamingRunner(queue_size=2, chunk_size=10)).execute(meta, long_stream_squares).data
+        self.assertEqual(next(stream), 0)
+        time.sleep(0.2)
+        self.assertLess(PRODUCED[0], 100)
+        self.assertEqual(sum(stream), sum(x * x for x in range(10 ** 5)))
+        self.assertEqual(PRODUCED[0], 10 ** 5)
+
+    def test_streaming_error(self):
+        with self.assertRaises(ValueError):
+            TaskMaster(StreamingRunner()).execute({}, broken_stream_sum).data
+
     def test_process(self):
         runner = ProcessingRunner()
-        self._run(runner)
\ No newline at end of file
+        self._run(runner)
+
+    def test_process_shared_memory(self):
+        with TaskMaster(ProcessingRunner(2)) as task_master:
+            for _ in range(2):
+                result = task_master.execute({"big_array": {"size": 1 << 20}}, doubled_array).data
+                self.assertIsInstance(result, np.ndarray)
+                self.assertEqual(result[-1], 2 * ((1 << 20) - 1))
+            pids = {task_master.execute({}, worker_pid).data for _ in range(4)}
+            self.assertNotIn(os.getpid(), pids)
+            self.assertLessEqual(len(pids), 2)
+
+    def test_process_cached_iterator(self):
+        cache = MemoryCache()
+        self.assertEqual(list(TaskMaster(cache=cache).execute({}, shared_loader).data), list(range(10)))
+        with TaskMaster(ProcessingRunner(2), cache=cache) as task_master:
+            self.assertEqual(task_master.execute({}, loader_diamond).data, (45, 10))
+
+    def test_hybrid(self):
+        with HybridRunner(cpu_workers=1) as runner:
+            self._run(runner)
+            inline, io, cpu, heavy = TaskMaster(runner).execute({}, hybrid_report).data
+        self.assertEqual(inline, threading.get_ident())
+        self.assertNotEqual(io, threading.get_ident())
+        self.assertNotEqual(cpu, os.getpid())
+        self.assertEqual(heavy, 450)
+
+    def test_hybrid_lanes(self):
+        recorder = TraceRecorder()
+        with HybridRunner(cpu_workers=1, tracer=recorder) as runner:
+            self.assertEqual(TaskMaster(runner).execute({}, cpu_naps).data, 3)
+        naps = sorted((span for span in recorder.spans if span.name != "cpu_naps"), key=lambda s: s.started)
+        for before, after in zip(naps, naps[1:]):
+            self.assertGreaterEqual(after.started, before.finished - 0.05)
+
+    def test_fail_fast(self):
+        for runner in (ThreadingRunner(), AsyncRunner(), StreamingRunner(), HybridRunner()):
+            with self.subTest(runner=type(runner).__name__), runner:
+                CANCELLED.clear()
+                result = TaskMaster(runner).execute({}, fail_fast_sum)
+                start = time.perf_counter()
+                with self.assertRaises(ValueError):
+                    result.data
+                self.assertLess(time.perf_counter() - start, 1)
+                self.assertEqual(result.status, TaskStatus.INVOCATION_ERROR)
+                self.assertIsInstance(result.error, ValueError)
+                time.sleep(0.1)
+                self.assertEqual(CANCELLED, [True])
+
+    def test_fail_fast_releases_shared_memory(self):
+        def segments():
+            return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+        for runner in (ProcessingRunner(2), ProcessingRunner(2, tracer=TraceRecorder()), HybridRunner(cpu_workers=2)):
+            with self.subTest(runner=type(runner).__name__), runner:
+                before = segments()
+                with self.assertRaises(ValueError):
+                    TaskMaster(runner).execute({}, abandoned_sum).data
+                time.sleep(0.6)
+                self.assertEqual(segments() - before, set())
+
+    def test_timeout(self):
+        for runner in (SimpleRunner(), ThreadingRunner(), AsyncRunner(), StreamingRunner()):
+            with self.subTest(runner=type(runner).__name__), runner:
+                start = time.perf_counter()
+                with self.assertRaises(TimeoutError):
+                    TaskMaster(runner).execute({}, sleepy).data
+                self.assertLess(time.perf_counter() - start, 1)
+
+    def test_tracing(self):
+        runners = SimpleRunner, ThreadingRunner, AsyncRunner, StreamingRunner, ProcessingRunner, HybridRunner
+        for runner_type in runners:
+            recorder = TraceRecorder()
+            runner = runner_type(2, tracer=recorder) if runner_type is ProcessingRunner else runner_type(tracer=recorder)
+            with self.subTest(runner=runner_type.__name__), runner:
+                self.assertEqual(TaskMaster(runner).execute({}, slow_sum).data, 3)
+                self.assertEqual(sorted(span.name for span in recorder.spans), ["slow_left", "slow_right", "slow_sum"])
+                for span in recorder.spans:
+                    self.assertGreaterEqual(span.started, span.ready)
+                    self.assertGreaterEqual(span.finished, span.started)
+                self.assertGreaterEqual(min(span.run_time for span in recorder.spans[:2]), DELAY * 0.9)
+                if runner_type is SimpleRunner:
+                    self.assertLess(recorder.parallelism(), 1.1)
+                else:
+                    self.assertGreater(recorder.parallelism(), 1.5)
+                if runner_type is ProcessingRunner:
+                    self.assertNotIn(os.getpid(), {span.pid for span in recorder.spans})
+
+    def test_tracing_start(self):
+        class Events(Tracer):
+            def __init__(self):
+                self.events = []
+                self.lock = threading.Lock()
+
+            def start(self, span):
+                with self.lock:
+                    self.events.append(("start", span.name, time.time()))
+
+            def finish(self, span):
+                with self.lock:
+                    self.events.append(("finish", span.name, span.finished))
+
+        for runner_type in (ThreadingRunner, AsyncRunner, StreamingRunner, ProcessingRunner, HybridRunner):
+            tracer = Events()
+            runner = runner_type(2, tracer=tracer) if runner_type is ProcessingRunner else runner_type(tracer=tracer)
+            with self.subTest(runner=runner_type.__name__), runner:
+                TaskMaster(runner).execute({}, slow_sum).data
+                kinds = [kind for kind, name, _ in tracer.events if name != "slow_sum"]
+                self.assertEqual(kinds, ["start", "start", "finish", "finish"])
+                times = {(kind, name): at for kind, name, at in tracer.events}
+                self.assertLess(times["start", "slow_left"], times["finish", "slow_left"] - DELAY * 0.9)
+
+    def test_tracing_error(self):
+        for runner_type in (SimpleRunner, ThreadingRunner, AsyncRunner, StreamingRunner, ProcessingRunner):
+            recorder = TraceRecorder()
+            with self.subTest(runner=runner_type.__name__), runner_type(tracer=recorder) as runner:
+                with self.assertRaises(ValueError):
+                    TaskMaster(runner).execute({}, failing).data
+                span, = recorder.spans
+                self.assertEqual(span.name, "failing")
+                self.assertIsInstance(span.error, ValueError)
+
+    def test_shared_node_evaluated_once(self):
+        runners = SimpleRunner(), ThreadingRunner(), AsyncRunner(), ProcessingRunner(2)
+        for runner in runners:
+            with self.subTest(runner=type(runner).__name__), runner:
+                LOADS.clear()
+                result = TaskMaster(runner).execute({}, loader_diamond)
+                self.assertEqual(result.data, (45, 10))
+                if not isinstance(runner, ProcessingRunner):
+                    self.assertEqual(len(LOADS), 1)
+
+    def test_shared_iterator_across_threads(self):
+        for runner in (ThreadingRunner(), AsyncRunner(), HybridRunner()):
+            with self.subTest(runner=type(runner).__name__), runner:
+                self.assertEqual(TaskMaster(runner).execute({}, big_stream_report).data,
+                                 (sum(range(200_000)), 200_000, 199_999))
+
+    def test_shared_node_distinct_meta(self):
+        LOADS.clear()
+        meta = {"loader_sum": {"shared_loader": {"stop": 5}}}
+        result = TaskMaster(SimpleRunner()).execute(meta, loader_diamond)
+        self.assertEqual(result.data, (10, 10))
+        self.assertEqual(len(LOADS), 2)
@@ -1,8 +1,42 @@
 from unittest import TestCase
 
 
+from stem.meta import Meta
+from stem.task import data, task, FunctionTask
+from stem.task_master import TaskMaster
 from stem.task_tree import TaskTree
-from .example_task import int_range, int_scale
+from .example_task import int_range, int_scale, int_reduce
+
+
+@data
+def diamond_bottom(meta: Meta) -> int:
+    return 1
+
+
+@task
+def diamond_left(meta: Meta, diamond_bottom: int) -> int:
+    return diamond_bottom
+
+
+@task
+def diamond_right(meta: Meta, diamond_bottom: int) -> int:
+    return diamond_bottom
+
+
+@task
+def diamond_top(meta: Meta, diamond_left: int, diamond_right: int) -> int:
+    return diamond_left + diamond_right
+
+
+def _add(meta: Meta, **kwargs: int) -> int:
+    return sum(kwargs.values())
+
+
+LAYERS = [diamond_bottom, diamond_left, diamond_right]
+for _depth in range(30):  # 2 ** 31 paths from the top to the bottom
+    _below = tuple(LAYERS[-2:])
+    LAYERS.extend(FunctionTask(f"{side}_{_depth}", _add, _below) for side in ("left", "right"))
+deep_top = FunctionTask("deep_top", _add, tuple(LAYERS[-2:]))
 
 
 class TaskTreeTest(TestCase):
@@ -11,3 +45,37 @@ class TaskTreeTest(TestCase):
 
     def test_task_tree(self):
         self.assertEqual(self.task_node.dependencies[0].task, int_range)
+
+    def test_find_node(self):
+        self.assertEqual(self.task_node.find_node(int_range).task, int_range)
+        self.assertIsNone(self.task_node.find_node(int_reduce))
+
+    def test_resolve_node_cached(self):
+        tree = TaskTree()
+        node = tree.resolve_node(int_reduce)
+        self.assertIs(tree.resolve_node(int_reduce), node)
+        self.assertIs(node.plan, tree.resolve_node(int_reduce).plan)
+        tree.clear()
+        self.assertIsNot(tree.resolve_node(int_reduce), node)
+
+    def test_plan(self):
+        plan = TaskTree().resolve_node(int_reduce).plan
+        self.assertEqual(plan.names, ["int_reduce", "int_scale", "int_range", "data_scale"])
+        self.assertEqual(plan.dependencies, [(1,), (2, 3), (), ()])
+        self.assertEqual(plan.order, [2, 3, 1, 0])
+
+    def test_shared_nodes(self):
+        tree = TaskTree()
+        node = tree.resolve_node(diamond_top)
+        self.assertIs(node.dependencies[0].dependencies[0], node.dependencies[1].dependencies[0])
+        self.assertEqual(len(node.plan), 4)
+        position = {i: p for p, i in enumerate(node.plan.order)}
+        for i, dependencies in enumerate(node.plan.dependencies):
+            self.assertTrue(all(position[d] < position[i] for d in dependencies))
+        self.assertIs(tree.find_node(diamond_bottom), node.dependencies[0].dependencies[0])
+        self.assertIs(node.find_node(diamond_bottom), tree.find_node(diamond_bottom))
+
+    def test_deep_diamonds(self):
+        node = TaskTree().resolve_node(deep_top)
+        self.assertEqual(len(node.plan), len(LAYERS) + 1)
+        self.assertEqual(TaskMaster().execute({}, deep_top).data, 2 ** 31)
@@ -0,0 +1,44 @@
+import io
+import json
+from unittest import TestCase
+
+from stem.trace import Span, TraceRecorder
+
+
+def span(name: str, ready: float, started: float, finished: float, tid: int = 1, **kwargs) -> Span:
+    return Span(name, {}, ready, started, finished, 100, tid, **kwargs)
+
+
+class TraceRecorderTest(TestCase):
+
+    def setUp(self) -> None:
+        self.recorder = TraceRecorder()
+        self.recorder.finish(span("load", 10.0, 10.0, 11.0, tid=1, size=64))
+        self.recorder.finish(span("load", 10.0, 10.5, 11.5, tid=2, size=64))
+        self.recorder.error(span("parse", 11.5, 11.75, 12.0, error=ValueError("bad")))
+
+    def test_chrome_trace(self):
+        file = io.StringIO()
+        self.recorder.write_chrome_trace(file)
+        events = json.loads(file.getvalue())["traceEvents"]
+        self.assertEqual([e["name"] for e in events], ["load", "load", "parse"])
+        self.assertEqual({e["ph"] for e in events}, {"X"})
+        self.assertEqual(events[1]["ts"], 0.5e6)
+        self.assertEqual(events[1]["dur"], 1e6)
+        self.assertEqual(events[1]["tid"], 2)
+        self.assertEqual(events[1]["args"]["queue_wait_ms"], 500)
+        self.assertEqual(events[2]["cat"], "error")
+        self.assertIn("bad", events[2]["args"]["error"])
+
+    def test_summary(self):
+        load, parse = self.recorder.summary()
+        self.assertEqual((load["name"], load["count"], load["errors"]), ("load", 2, 0))
+        self.assertEqual((load["run_time"], load["queue_wait"], load["size"]), (2.0, 0.5, 128))
+        self.assertEqual((parse["name"], parse["errors"]), ("parse", 1))
+        self.assertAlmostEqual(self.recorder.parallelism(), 2.25 / 2)
+        self.assertIn("parallelism 1.12", self.recorder.format_summary())
+
+    def test_empty(self):
+        recorder = TraceRecorder()
+        self.assertEqual(recorder.chrome_trace()["traceEvents"], [])
+        self.assertEqual(recorder.parallelism(), 0.0)
@@ -1,7 +1,7 @@
 from unittest import TestCase
 
-from stem.workspace import Workspace, IWorkspace, ProxyTask, LocalWorkspace
-from tests.example_task import int_range
+from stem.workspace import Workspace, IWorkspace, ProxyTask, LocalWorkspace, TaskPath
+from tests.example_task import int_range, int_scale
 from tests.example_workspace import IntWorkspace, SubWorkspace, SubSubWorkspace
 
 
@@ -65,3 +65,47 @@ class WorkspaceTest(TestCase):
                                                'tasks': ['sub_sub_int_range'],
                                                'workspaces': []}]}]}
         self.assertDictEqual(ref, IntWorkspace.structure())
+
+    def test_dotted_path(self):
+        self.assertIs(IntWorkspace.find_task("SubWorkspace.int_reduce"), SubWorkspace.int_reduce)
+        self.assertIs(IntWorkspace.find_task("SubWorkspace.SubSubWorkspace.sub_sub_int_range"),
+                      SubSubWorkspace.sub_sub_int_range)
+        self.assertIs(IntWorkspace.find_task(TaskPath("SubWorkspace.sub_sub_int_range")),
+                      SubSubWorkspace.sub_sub_int_range)
+        self.assertIsNone(IntWorkspace.find_task("SubSubWorkspace.int_reduce"))
+
+    def test_index_invalidation(self):
+        sub = LocalWorkspace("sub", {"a": int_range})
+        workspace = LocalWorkspace("top", {}, {sub})
+        self.assertIsNone(workspace.find_task("b"))
+        sub.tasks["b"] = int_range
+        self.assertIs(workspace.find_task("sub.b"), int_range)
+        self.assertIs(workspace.structure(), workspace.structure())
+        self.assertEqual(workspace.structure()["workspaces"][0]["tasks"], ["a", "b"])
+
+    def test_index_replacement(self):
+        sub = LocalWorkspace("sub", {"a": int_range})
+        workspace = LocalWorkspace("top", {}, {sub})
+        self.assertIs(workspace.find_task("a"), int_range)
+        sub.tasks["a"] = int_scale
+        self.assertIs(workspace.find_task("sub.a"), int_scale)
+        workspace.workspaces.discard(sub)
+        self.assertIsNone(workspace.find_task("a"))
+
+    def test_untracked_index(self):
+        class Listed(IWorkspace):
+            name = "listed"
+            listing = {"a": int_range}
+
+            @property
+            def tasks(self):
+                return dict(self.listing)
+
+            @property
+            def workspaces(self):
+                return set()
+
+        workspace = Listed()
+        self.assertIs(workspace.find_task("a"), int_range)
+        workspace.listing["b"] = int_scale
+        self.assertIs(workspace.find_task("b"), int_scale)